@@ -0,0 +1,66 @@
+class Achievement:
+    __slots__ = ('name', 'description', 'watches', 'check')
+
+    def __init__(self, name, description, watches, check):
+        self.name = name
+        self.description = description
+        self.watches = tuple(watches)
+        self.check = check
+
+
+# Names are stored in profile.achievements, so never rename one
+ACHIEVEMENTS = (
+    Achievement("💵 First Paycheck", "Have $100", ('money',), lambda p: p.money >= 100),
+    Achievement("💰 Thousandaire", "Have $1,000", ('money',), lambda p: p.money >= 1000),
+    Achievement("💎 Six Figures", "Have $100,000", ('money',), lambda p: p.money >= 100000),
+    Achievement("🏰 Millionaire", "Have $1,000,000", ('money',), lambda p: p.money >= 1000000),
+    Achievement("📈 Rising Star", "Reach level 5", ('level',), lambda p: p.level >= 5),
+    Achievement("🎓 Veteran", "Reach level 10", ('level',), lambda p: p.level >= 10),
+    Achievement("🏅 Legend", "Reach level 25", ('level',), lambda p: p.level >= 25),
+    Achievement("👔 Employed", "Get your first job", ('job',), lambda p: p.job != 'Homeless'),
+    Achievement("🏢 Top of the Ladder", "Become a CEO", ('job',), lambda p: p.job == 'CEO'),
+    Achievement("📊 Investor", "Own shares", ('stocks',), lambda p: bool(p.stocks)),
+    Achievement("🎒 Collector", "Own 3 different items", ('inventory',), lambda p: len(p.inventory) >= 3),
+    Achievement("👑 VIP", "Get premium", ('premium',), lambda p: p.premium),
+)
+
+
+class AchievementEngine:
+    """Awards achievements, checking only rules that watch a changed field.
+
+    Rules are indexed by the profile fields they watch, so after a
+    mutation evaluate(profile, fields) looks at a handful of rules
+    instead of all of them, and rules already earned are skipped.
+    """
+
+    def __init__(self, achievements=ACHIEVEMENTS):
+        self.achievements = tuple(achievements)
+        self._by_field = {}
+        for achievement in self.achievements:
+            for name in achievement.watches:
+                self._by_field.setdefault(name, []).append(achievement)
+
+    def _award(self, profile, rules):
+        earned = None
+        awarded = []
+        for achievement in rules:
+            if earned is None:
+                earned = set(profile.achievements)
+            if achievement.name not in earned and achievement.check(profile):
+                earned.add(achievement.name)
+                profile.achievements.append(achievement.name)
+                awarded.append(achievement.name)
+        return awarded
+
+    def evaluate(self, profile, fields):
+        """Award rules watching any of fields; returns the names newly earned"""
+        if len(fields) == 1:
+            rules = self._by_field.get(fields[0], ())
+        else:
+            # A rule watching several changed fields is only checked once
+            rules = dict.fromkeys(rule for name in fields for rule in self._by_field.get(name, ()))
+        return self._award(profile, rules)
+
+    def evaluate_all(self, profile):
+        """Check every rule, e.g. for a batch run after adding achievements"""
+        return self._award(profile, self.achievements)
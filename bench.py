@@ -0,0 +1,225 @@
+"""Load simulation for the bot's command handlers.
+
+Drives the real command coroutines with fake contexts against in-memory
+storage and reports throughput plus latency percentiles per command.
+
+    python bench.py --users 500 --rounds 20 --mix work=5,crime=3,profile=1,start=1
+    python bench.py --seed 7 --record run.ndjson    # save every outcome
+    python bench.py --replay run.ndjson             # rerun it and check nothing changed
+
+Game outcomes come from a seeded RNGService with one stream per user, so
+a run with the same arguments produces the same outcomes however the
+event loop interleaves the users.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import random
+import tempfile
+import time
+
+# Must be set before main is imported so it builds in-memory storage
+os.environ["STORAGE_BACKEND"] = "memory"
+
+import main
+from dispatcher import coalesced_messages, dropped_messages
+from rng import RNGService
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+        self.display_name = f"user{user_id}"
+        self.name = self.display_name
+        self.bot = False
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+
+class FakeContext:
+    """Just enough of commands.Context for the handlers"""
+
+    def __init__(self, user, channel):
+        self.author = user
+        self.channel = channel
+        self.command = None
+
+
+def invoke(name, *args):
+    """Call a command's handler directly, skipping parsing and checks"""
+    command = main.bot.get_command(name)
+    return command.callback(command.cog, *args)
+
+
+COMMANDS = {
+    'work': lambda ctx: invoke('work', ctx),
+    'crime': lambda ctx: invoke('crime', ctx),
+    'profile': lambda ctx: invoke('profile', ctx, None),
+    'start': lambda ctx: invoke('start', ctx),
+}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in COMMANDS:
+            raise argparse.ArgumentTypeError(f"unknown command {name!r}, choose from {', '.join(COMMANDS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def simulate_user(user_id, channel, rounds, names, weights, rng, reset_cooldowns, latencies, outcomes):
+    ctx = FakeContext(FakeUser(user_id), channel)
+    history = outcomes.setdefault(user_id, []) if outcomes is not None else None
+    for name in rng.choices(names, weights, k=rounds):
+        if reset_cooldowns:
+            profile = await main.get_user_profile(user_id)
+            profile.last_work = None
+            profile.last_crime = None
+            main.cooldowns.start(user_id, 'work', 0)
+            main.cooldowns.start(user_id, 'crime', 0)
+        start = time.perf_counter()
+        await COMMANDS[name](ctx)
+        latencies[name].append(time.perf_counter() - start)
+        if history is not None:
+            profile = await main.get_user_profile(user_id)
+            history.append([name, profile.money, profile.level, profile.experience])
+
+
+def record_outcomes(path, args, outcomes):
+    with open(path, 'w', encoding='utf-8') as f:
+        settings = {name: getattr(args, name) for name in REPLAYED_ARGS}
+        f.write(json.dumps(settings) + '\n')
+        for user_id in sorted(outcomes):
+            f.write(json.dumps({'user_id': user_id, 'outcomes': outcomes[user_id]}) + '\n')
+
+
+def load_recording(path):
+    with open(path, encoding='utf-8') as f:
+        settings = json.loads(f.readline())
+        return settings, {record['user_id']: record['outcomes'] for record in map(json.loads, f)}
+
+
+def compare_outcomes(expected, actual):
+    """Print the first divergence per user; returns how many users diverged"""
+    diverged = 0
+    for user_id in sorted(expected):
+        got_history = actual.get(user_id, [])
+        for round_number, want in enumerate(expected[user_id]):
+            got = got_history[round_number] if round_number < len(got_history) else None
+            if want != got:
+                if diverged < 10:
+                    print(f"user {user_id} round {round_number}: expected {want}, got {got}")
+                diverged += 1
+                break
+    return diverged
+
+
+async def run(args):
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    latencies = {name: [] for name in names}
+    # Only track outcomes when they're needed, so plain runs measure just the commands
+    outcomes = {} if args.record or args.replay else None
+    rng = random.Random(args.seed)
+    main.rng = RNGService(seed=args.seed)
+    await main.load_extensions(main.COMMAND_EXTENSIONS)
+    channels = [FakeChannel(channel_id) for channel_id in range(1, args.channels + 1)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        simulate_user(user_id, channels[user_id % len(channels)], args.rounds, names, weights,
+                      random.Random(rng.random()), args.reset_cooldowns, latencies, outcomes)
+        for user_id in range(1, args.users + 1)
+    ])
+    elapsed = time.perf_counter() - start
+    queued = main.dispatcher.queue_depth
+    await main.dispatcher.close(timeout=0)
+    await main.profile_cache.close()
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.users} users x {args.rounds} rounds = {total} commands in {elapsed:.3f}s "
+          f"({total / elapsed:,.0f} cmd/s)")
+    print(f"{sum(channel.sent for channel in channels)} messages sent to {len(channels)} channels, "
+          f"{queued} still queued for rate limits, "
+          f"{coalesced_messages.value():.0f} coalesced, {dropped_messages.value():.0f} dropped")
+    print(f"{'command':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    everything = []
+    for name in names:
+        values = sorted(latencies[name])
+        everything.extend(values)
+        print(f"{name:<10}{len(values):>8}"
+              f"{percentile(values, 50) * 1000:>10.3f}"
+              f"{percentile(values, 95) * 1000:>10.3f}"
+              f"{percentile(values, 99) * 1000:>10.3f}")
+    everything.sort()
+    print(f"{'all':<10}{len(everything):>8}"
+          f"{percentile(everything, 50) * 1000:>10.3f}"
+          f"{percentile(everything, 95) * 1000:>10.3f}"
+          f"{percentile(everything, 99) * 1000:>10.3f}")
+    return outcomes
+
+
+# Settings stored in a recording so --replay reruns exactly the same load
+REPLAYED_ARGS = ('users', 'rounds', 'channels', 'mix', 'seed', 'reset_cooldowns')
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's command handlers")
+    parser.add_argument('--users', type=int, default=100, help="number of concurrent simulated users")
+    parser.add_argument('--rounds', type=int, default=20, help="commands issued per user")
+    parser.add_argument('--channels', type=int, default=10, help="number of channels the users talk in")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('work=5,crime=3,profile=1,start=1'),
+                        help="weighted command mix, e.g. work=5,crime=3,profile=1,start=1")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the command sequence")
+    parser.add_argument('--reset-cooldowns', action='store_true',
+                        help="clear cooldowns before each command so every call takes the full path")
+    parser.add_argument('--record', metavar='FILE', help="save every command's outcome to FILE")
+    parser.add_argument('--replay', metavar='FILE', help="rerun a recording and check the outcomes match")
+    args = parser.parse_args()
+
+    expected = None
+    if args.replay:
+        settings, expected = load_recording(args.replay)
+        for name, value in settings.items():
+            setattr(args, name, value)
+
+    # Money changes still go through a real ledger, in a directory removed afterwards
+    with tempfile.TemporaryDirectory(prefix='bench-ledger-') as ledger_dir:
+        ledger = main.open_ledger(ledger_dir)
+        try:
+            outcomes = asyncio.run(run(args))
+        finally:
+            ledger.close()
+
+    if args.record:
+        record_outcomes(args.record, args, outcomes)
+    if expected is not None:
+        diverged = compare_outcomes(expected, outcomes)
+        if diverged:
+            print(f"Replay diverged for {diverged} of {len(expected)} users")
+            sys.exit(1)
+        print(f"Replay matched all {len(expected)} users")
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,352 @@
+import asyncio
+import json
+import weakref
+from collections import OrderedDict
+
+
+class ProfileCache:
+    """In-process LRU cache of decoded profiles with write-behind flushing.
+
+    Mutated profiles are only marked dirty; a background task writes all
+    dirty profiles in one storage batch every flush_interval seconds, and
+    close() writes whatever is left on shutdown.
+
+    With a ledger, every flush also stores the ledger's last seq under
+    checkpoint_key in the same batch, marking which events the stored
+    profiles already include.
+
+    When several processes share the storage, set sync_interval so the
+    cache regularly drops entries other processes have rewritten, and
+    on_remote_change(user_ids) is awaited with the ids it dropped.
+
+    Pass merge(base, local, remote) as well so concurrent writes from
+    several processes never overwrite each other: the cache remembers the
+    stored version each profile was loaded from and flushes with
+    compare_and_put_many(). When another process wrote a profile in the
+    meantime, merge folds its changes into the local profile (base is what
+    was loaded) and the batch is retried. The version is remembered even
+    after sync or eviction drops a profile a command still holds, so saving
+    that profile later merges instead of overwriting.
+    """
+
+    MAX_MERGE_ATTEMPTS = 5
+
+    def __init__(self, storage, max_size=10000, flush_interval=5.0,
+                 key_prefix='user_', encode=json.dumps, decode=json.loads,
+                 sync_interval=None, on_remote_change=None,
+                 ledger=None, checkpoint_key='ledger_checkpoint', merge=None):
+        self.storage = storage
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self.on_remote_change = on_remote_change
+        self.ledger = ledger
+        self.checkpoint_key = checkpoint_key
+        self.key_prefix = key_prefix
+        self.encode = encode
+        self.decode = decode
+        self.merge = merge
+
+        self._entries = OrderedDict()  # user_id -> profile, least recent first
+        self._dirty = set()
+        self._evicted = {}  # dirty profiles pushed out of the LRU, awaiting flush
+        self._loading = {}  # user_id -> Future for loads already in flight
+        self._bases = {}  # user_id -> (version, stored data) the profile was loaded from, with merge
+        self._detached = {}  # user_id -> (weakref to a dropped profile, version, stored data), with merge
+        self._flush_lock = asyncio.Lock()
+        self._seq = None  # storage change sequence seen by the last sync
+        self._tasks = []
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def dirty_count(self):
+        return len(self._dirty) + len(self._evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, user_id):
+        """Return the cached profile, loading it from storage on a miss"""
+        user_id = str(user_id)
+        profile = self._entries.get(user_id)
+        if profile is not None:
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return profile
+
+        if user_id in self._evicted:
+            # Evicted but not written yet; storage would return stale data
+            self.hits += 1
+            profile = self._evicted.pop(user_id)
+            self._insert(user_id, profile, dirty=True)
+            return profile
+
+        self.misses += 1
+        pending = self._loading.get(user_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = future
+        try:
+            if self.merge is not None:
+                data, version = await self.storage.get_versioned(self.key_prefix + user_id)
+            else:
+                data = await self.storage.get(self.key_prefix + user_id)
+            profile = self.decode(data) if data else None
+            if profile is not None and user_id not in self._entries:
+                self._insert(user_id, profile, dirty=False)
+                if self.merge is not None:
+                    self._bases[user_id] = (version, data)
+            elif user_id in self._entries:
+                profile = self._entries[user_id]
+            future.set_result(profile)
+            return profile
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._loading[user_id]
+
+    def put(self, user_id, profile, dirty=True):
+        """Insert or replace a profile; dirty profiles are written on the next flush.
+
+        A clean put never replaces a profile with unflushed changes.
+        """
+        user_id = str(user_id)
+        if not dirty and (user_id in self._dirty or user_id in self._evicted):
+            return
+        if dirty and self.merge is not None:
+            self._adopt(user_id, profile)
+        self._evicted.pop(user_id, None)
+        self._insert(user_id, profile, dirty)
+
+    def _cached(self, user_id):
+        if user_id in self._entries:
+            return self._entries[user_id]
+        return self._evicted.get(user_id)
+
+    def _adopt(self, user_id, profile):
+        """Carry the stored version over to a profile that is about to replace the cached one.
+
+        A command may save a profile that sync or eviction dropped while it
+        held it. Its remembered base keeps the next flush a merge; if the
+        profile was reloaded meanwhile, the reloaded copy is merged in first.
+        """
+        current = self._cached(user_id)
+        if current is profile:
+            return
+        base = None
+        detached = self._detached.get(user_id)
+        if detached is not None and detached[0]() is profile:
+            del self._detached[user_id]
+            base = detached[1:]
+        if base is None:
+            return
+        if current is None:
+            self._bases[user_id] = base
+        else:
+            self.merge(self.decode(base[1]) if base[1] else None, profile, current)
+
+    def _detach(self, user_id, profile, base):
+        """Remember the base of a profile outside the cache for as long as anything holds it"""
+        def forget(ref):
+            if self._detached.get(user_id, (None,))[0] is ref:
+                del self._detached[user_id]
+        self._detached[user_id] = (weakref.ref(profile, forget),) + tuple(base)
+
+    def _drop(self, user_id):
+        profile = self._entries.pop(user_id, None)
+        base = self._bases.pop(user_id, None)
+        if profile is not None and base is not None:
+            self._detach(user_id, profile, base)
+
+    def _set_base(self, user_id, profile, base):
+        if self._cached(user_id) is profile:
+            self._bases[user_id] = base
+        else:
+            self._detach(user_id, profile, base)
+
+    def setdefault(self, user_id, profile):
+        """Return the cached profile, caching profile as clean if there is none.
+
+        Use this to create new profiles: two commands that both missed can
+        then only ever end up sharing the first one created.
+        """
+        user_id = str(user_id)
+        existing = self._entries.get(user_id)
+        if existing is not None:
+            self._entries.move_to_end(user_id)
+            return existing
+        if user_id in self._evicted:
+            existing = self._evicted.pop(user_id)
+            self._insert(user_id, existing, dirty=True)
+            return existing
+        self._insert(user_id, profile, dirty=False)
+        if self.merge is not None:
+            self._bases[user_id] = (0, None)
+        return profile
+
+    def _insert(self, user_id, profile, dirty):
+        self._entries[user_id] = profile
+        self._entries.move_to_end(user_id)
+        if dirty:
+            self._dirty.add(user_id)
+        while len(self._entries) > self.max_size:
+            old_id, old_profile = self._entries.popitem(last=False)
+            if old_id in self._dirty:
+                self._dirty.discard(old_id)
+                self._evicted[old_id] = old_profile
+            else:
+                base = self._bases.pop(old_id, None)
+                if base is not None:
+                    self._detach(old_id, old_profile, base)
+
+    async def flush(self):
+        """Write every dirty profile to storage in a single batch"""
+        async with self._flush_lock:
+            if not self._dirty and not self._evicted:
+                return 0
+
+            # Encode synchronously so the batch is a consistent snapshot
+            batch = dict(self._evicted)
+            for user_id in self._dirty:
+                batch[user_id] = self._entries[user_id]
+            self._dirty.clear()
+            self._evicted.clear()
+            encoded = self._encode(batch)
+            # Entries can be evicted or dropped by sync while we wait on storage
+            bases = {user_id: self._bases[user_id] for user_id in batch if user_id in self._bases}
+
+            extra = []
+            seq = None
+            if self.ledger is not None:
+                # Every event so far is reflected in a profile in this batch or an earlier one
+                seq = self.ledger.last_seq
+                self.ledger.flush()
+                extra.append((self.checkpoint_key, str(seq)))
+
+            try:
+                if self.merge is None:
+                    await self.storage.put_many([(self.key_prefix + user_id, value) for user_id, value in encoded.items()] + extra)
+                    merged = ()
+                else:
+                    merged = await self._write_merging(batch, encoded, extra, bases)
+            except Exception:
+                # Put everything back so the next flush retries it
+                for user_id, profile in batch.items():
+                    if user_id in self._entries:
+                        self._dirty.add(user_id)
+                    else:
+                        self._evicted.setdefault(user_id, profile)
+                    if user_id in bases:
+                        self._set_base(user_id, profile, bases[user_id])
+                raise
+            if seq is not None:
+                self.ledger.checkpoint(seq)
+            if merged and self.on_remote_change is not None:
+                await self.on_remote_change(sorted(merged))
+            return len(batch)
+
+    def _encode(self, batch):
+        encoded = {}
+        for user_id, profile in list(batch.items()):
+            try:
+                encoded[user_id] = self.encode(profile)
+            except Exception as e:
+                # Retrying can't fix a profile that doesn't encode; don't let it block the others
+                print(f"Error encoding profile {user_id}, not saving it: {e}")
+                del batch[user_id]
+        return encoded
+
+    async def _write_merging(self, batch, encoded, extra, bases):
+        """Compare-and-swap the batch, merging in profiles another process wrote first.
+
+        bases is updated as profiles are merged. Returns the ids of the
+        profiles that were merged.
+        """
+        merged = set()
+        for _ in range(self.MAX_MERGE_ATTEMPTS):
+            items = [(self.key_prefix + user_id, value) for user_id, value in encoded.items()]
+            expected = {self.key_prefix + user_id: version for user_id, (version, _) in bases.items()}
+            version, conflicts = await self.storage.compare_and_put_many(items + extra, expected)
+            if not conflicts:
+                for user_id, value in encoded.items():
+                    self._set_base(user_id, batch[user_id], (version, value))
+                return merged
+
+            for key, (data, current) in conflicts.items():
+                user_id = key[len(self.key_prefix):]
+                base = bases[user_id][1]
+                self.merge(
+                    self.decode(base) if base else None,
+                    batch[user_id],
+                    self.decode(data) if data else None
+                )
+                bases[user_id] = (current, data)
+                encoded[user_id] = self.encode(batch[user_id])
+                merged.add(user_id)
+        raise RuntimeError(f"Profiles kept changing in another process: {', '.join(sorted(merged))}")
+
+    async def sync(self):
+        """Drop clean entries another process has rewritten since the last sync.
+
+        Returns the dropped user ids. Entries with unflushed local changes
+        are kept; with merge, their flush merges in the other process's
+        write, otherwise the last writer wins.
+        """
+        seq, keys = await self.storage.changes_since(self._seq)
+        first_sync = self._seq is None
+        self._seq = seq
+        if first_sync:
+            return []
+
+        changed = []
+        for key in keys:
+            if not key.startswith(self.key_prefix):
+                continue
+            user_id = key[len(self.key_prefix):]
+            if user_id in self._dirty or user_id in self._evicted:
+                continue
+            self._drop(user_id)
+            changed.append(user_id)
+        return changed
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing profiles: {e}")
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                changed = await self.sync()
+                if changed and self.on_remote_change is not None:
+                    await self.on_remote_change(changed)
+            except Exception as e:
+                print(f"Error syncing profiles: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._flush_loop()))
+        if self.sync_interval:
+            self._tasks.append(asyncio.create_task(self._sync_loop()))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        await self.flush()
@@ -0,0 +1,128 @@
+import math
+import time
+from datetime import datetime
+
+import discord
+from discord.ext import commands
+
+import main
+from templates import field, build_embed, GIFT_TEMPLATE, LOAN_TEMPLATE
+
+# Loan terms for !deal
+MAX_LOAN = 50000
+MAX_LOAN_DAYS = 30
+LOAN_INTEREST = 0.10
+
+
+class Banking(commands.Cog):
+    """Moving money between players: gifts and loans"""
+
+    @commands.command(name='gift')
+    async def gift(self, ctx, member: discord.Member, amount: int):
+        """Gift money to another player"""
+        if member.id == ctx.author.id:
+            await main.send(ctx, "❌ You can't gift money to yourself!")
+            return
+        if member.bot:
+            await main.send(ctx, "❌ Bots don't need money!")
+            return
+        if amount <= 0:
+            await main.send(ctx, "❌ Gift amount must be positive!")
+            return
+        
+        async with main.user_locks.transaction(ctx.author.id, member.id):
+            sender = await main.get_user_profile(ctx.author.id)
+            receiver = await main.get_user_profile(member.id)
+            
+            if sender.money < amount:
+                await main.send(ctx, f"❌ You only have ${sender.money:,}!")
+                return
+            
+            main.change_money(ctx.author.id, sender, -amount, 'gift_sent')
+            main.change_money(member.id, receiver, amount, 'gift_received')
+            main.save_user_profiles({ctx.author.id: sender, member.id: receiver})
+        
+        embed = build_embed(
+            GIFT_TEMPLATE,
+            [field("💳 Your Money", f"${sender.money:,}")],
+            description=f"{ctx.author.mention} gifted ${amount:,} to {member.mention}!"
+        )
+        
+        await main.send(ctx, embed=embed)
+
+    @commands.command(name='deal')
+    async def deal(self, ctx, member: discord.Member, amount: int, days: int):
+        """Lend money to another player"""
+        if member.id == ctx.author.id:
+            await main.send(ctx, "❌ You can't lend money to yourself!")
+            return
+        if member.bot:
+            await main.send(ctx, "❌ Bots don't need loans!")
+            return
+        if not 0 < amount <= MAX_LOAN:
+            await main.send(ctx, f"❌ Loan amount must be between $1 and ${MAX_LOAN:,}!")
+            return
+        if not 0 < days <= MAX_LOAN_DAYS:
+            await main.send(ctx, f"❌ Loan duration must be between 1 and {MAX_LOAN_DAYS} days!")
+            return
+        
+        async with main.user_locks.transaction(ctx.author.id, member.id):
+            if await main.scheduler.fetch('loan', member.id) is not None:
+                await main.send(ctx, f"❌ {member.display_name} already has a loan to repay!")
+                return
+            
+            lender = await main.get_user_profile(ctx.author.id)
+            borrower = await main.get_user_profile(member.id)
+            if lender.money < amount:
+                await main.send(ctx, f"❌ You only have ${lender.money:,}!")
+                return
+            
+            owed = math.ceil(amount * (1 + LOAN_INTEREST))
+            due = int(time.time()) + days * 24 * 60 * 60
+            await main.scheduler.schedule('loan', member.id, due, {'lender': str(ctx.author.id), 'owed': owed})
+            
+            main.change_money(ctx.author.id, lender, -amount, 'loan_given')
+            main.change_money(member.id, borrower, amount, 'loan_received')
+            main.save_user_profiles({ctx.author.id: lender, member.id: borrower})
+        
+        fields = [
+            field("💸 To Repay", f"${owed:,}"),
+            field("📅 Due", datetime.fromtimestamp(due).strftime('%b %d, %Y %H:%M'))
+        ]
+        embed = build_embed(LOAN_TEMPLATE, fields, description=f"{ctx.author.mention} lent ${amount:,} to {member.mention}!")
+        
+        await main.send(ctx, embed=embed)
+
+    @commands.command(name='repay')
+    async def repay(self, ctx):
+        """Repay your loan in full"""
+        loan = await main.scheduler.fetch('loan', ctx.author.id)
+        if loan is None:
+            await main.send(ctx, "✅ You don't owe anybody money!")
+            return
+        
+        lender_id = loan.data['lender']
+        owed = loan.data['owed']
+        async with main.user_locks.transaction(ctx.author.id, lender_id):
+            if not await main.scheduler.is_live(loan):
+                await main.send(ctx, "✅ You don't owe anybody money!")
+                return
+            
+            borrower = await main.get_user_profile(ctx.author.id)
+            if borrower.money < owed:
+                due = datetime.fromtimestamp(loan.due).strftime('%b %d, %Y %H:%M')
+                await main.send(ctx, f"❌ You owe ${owed:,} but only have ${borrower.money:,}! Repay by {due}.")
+                return
+            
+            lender = await main.get_user_profile(lender_id)
+            await main.scheduler.cancel('loan', ctx.author.id)
+            
+            main.change_money(ctx.author.id, borrower, -owed, 'loan_repaid')
+            main.change_money(lender_id, lender, owed, 'loan_repaid')
+            main.save_user_profiles({ctx.author.id: borrower, lender_id: lender})
+        
+        await main.send(ctx, f"✅ You repaid ${owed:,} to <@{lender_id}>! You have ${borrower.money:,} left.")
+
+
+async def setup(bot):
+    await bot.add_cog(Banking())
@@ -0,0 +1,249 @@
+import time
+from datetime import datetime
+
+import discord
+from discord.ext import commands
+
+import main
+from cooldowns import work_cooldown, CRIME_COOLDOWN
+from templates import (
+    field, build_embed, START_TEMPLATE, PROFILE_TEMPLATE, WORK_TEMPLATE, CRIME_SUCCESS_TEMPLATE,
+    CRIME_FAILURE_TEMPLATE, ACHIEVEMENTS_TEMPLATE, WORK_MESSAGES, CRIMES, JOB_MULTIPLIERS
+)
+
+
+class Economy(commands.Cog):
+    """Earning money and looking at profiles"""
+
+    @commands.command(name='start')
+    async def start_game(self, ctx):
+        """Start your journey from poor to rich!"""
+        profile = await main.get_user_profile(ctx.author.id)
+        
+        embed = build_embed(
+            START_TEMPLATE,
+            [
+                field("💰 Money", f"${profile.money}"),
+                field("👔 Job", profile.job),
+                field("📊 Level", f"{profile.level}"),
+                field("🏆 Status", main.get_status_from_money(profile.money)),
+            ],
+            description=f"Welcome {ctx.author.mention}! Your journey begins..."
+        )
+        
+        await main.send(ctx, embed=embed)
+
+    @commands.command(name='profile')
+    async def show_profile(self, ctx, member: discord.Member = None):
+        """Show your or someone else's profile"""
+        target = member or ctx.author
+        profile = await main.get_user_profile(target.id)
+        
+        fields = [
+            field("💰 Money", f"${profile.money:,}"),
+            field("👔 Job", profile.job),
+            field("📊 Level", f"{profile.level}"),
+            field("⭐ Experience", f"{profile.experience}/{main.get_level_requirements(profile.level)}"),
+            field("🏆 Status", main.get_status_from_money(profile.money)),
+            field("👑 Premium", main.format_premium_status(profile)),
+        ]
+        
+        # Show account creation date
+        if profile.created_at:
+            created = datetime.fromtimestamp(profile.created_at)
+            fields.append(field("📅 Joined", created.strftime("%B %d, %Y")))
+        
+        if profile.achievements:
+            fields.append(field("🏅 Achievements", '\n'.join(profile.achievements[:5]), inline=False))
+        
+        if profile.inventory:
+            items = [item.replace('_', ' ').title() for item in profile.inventory.keys()]
+            fields.append(field("🎒 Inventory", ', '.join(items[:5]), inline=False))
+        
+        embed = build_embed(PROFILE_TEMPLATE, fields, title=f"👤 {target.display_name}'s Profile")
+        
+        await main.send(ctx, embed=embed)
+
+    @commands.command(name='work')
+    async def work(self, ctx):
+        """Work to earn money"""
+        # Reject spam from memory, before touching the profile
+        remaining = int(main.cooldowns.remaining(ctx.author.id, 'work'))
+        if remaining > 0:
+            await main.send(ctx, f"⏰ You need to wait {remaining//60}m {remaining%60}s before working again!")
+            return
+        
+        dice = main.rng.user(ctx.author.id)
+        async with main.user_locks.user(ctx.author.id):
+            profile = await main.get_user_profile(ctx.author.id)
+            cooldown = work_cooldown(profile, main.is_premium(profile))
+            
+            # Check cooldown (the profile is authoritative after a restart or in another process)
+            if profile.last_work:
+                remaining = int(profile.last_work + cooldown - time.time())
+                if remaining > 0:
+                    main.cooldowns.start(ctx.author.id, 'work', remaining)
+                    await main.send(ctx, f"⏰ You need to wait {remaining//60}m {remaining%60}s before working again!")
+                    return
+            
+            # Start the cooldown now, unless another worker just did
+            remaining = await main.cooldowns.claim(ctx.author.id, 'work', cooldown)
+            if remaining > 0:
+                remaining = int(remaining)
+                await main.send(ctx, f"⏰ You need to wait {remaining//60}m {remaining%60}s before working again!")
+                return
+            
+            # Work earnings based on level and job
+            base_earnings = dice.randint(10, 50)
+            level_bonus = profile.level * 5
+            earnings = base_earnings + level_bonus
+            
+            # Job multiplier
+            multiplier = JOB_MULTIPLIERS.get(profile.job, 1.0)
+            
+            # Item bonuses
+            if 'phone' in profile.inventory:
+                multiplier *= 1.1  # 10% bonus
+            if 'laptop' in profile.inventory:
+                multiplier *= 1.25  # 25% bonus
+            
+            # Premium bonuses
+            if main.is_premium(profile):
+                if profile.premium_expires:
+                    # Monthly/weekly premium
+                    multiplier *= 3.0  # 3x earnings
+                else:
+                    # Lifetime premium
+                    multiplier *= 5.0  # 5x earnings
+            
+            final_earnings = int(earnings * multiplier)
+            exp_gained = dice.randint(5, 15)
+            earned_before = len(profile.achievements)
+            
+            main.change_money(ctx.author.id, profile, final_earnings, 'work')
+            profile.experience += exp_gained
+            profile.last_work = int(time.time())
+            
+            # Check for level up
+            leveled_up = main.check_level_up(profile)
+            
+            # Job promotions based on money
+            old_job = profile.job
+            if profile.money >= 1000 and profile.job == 'Homeless':
+                profile.job = 'Street Cleaner'
+            elif profile.money >= 5000 and profile.job == 'Street Cleaner':
+                profile.job = 'Cashier'
+            elif profile.money >= 25000 and profile.job == 'Cashier':
+                profile.job = 'Office Worker'
+            elif profile.money >= 100000 and profile.job == 'Office Worker':
+                profile.job = 'Manager'
+            elif profile.money >= 500000 and profile.job == 'Manager':
+                profile.job = 'CEO'
+            
+            if leveled_up or old_job != profile.job:
+                main.achievement_engine.evaluate(profile, ('level', 'job'))
+            unlocked = profile.achievements[earned_before:]
+            
+            # Save profile to database
+            main.save_user_profile(ctx.author.id, profile)
+        
+        fields = [
+            field("💰 Earned", f"${final_earnings}"),
+            field("💳 Total Money", f"${profile.money:,}"),
+            field("⭐ XP Gained", f"+{exp_gained}"),
+        ]
+        
+        if leveled_up:
+            fields.append(field("📈 Level Up!", f"You reached level {profile.level}!", inline=False))
+        
+        if old_job != profile.job:
+            fields.append(field("🎉 Promotion!", f"You got promoted to {profile.job}!", inline=False))
+        
+        if unlocked:
+            fields.append(field("🏅 Achievement Unlocked!", '\n'.join(unlocked), inline=False))
+        
+        embed = build_embed(WORK_TEMPLATE, fields, description=dice.choice(WORK_MESSAGES))
+        
+        await main.send(ctx, embed=embed)
+
+    @commands.command(name='crime')
+    async def commit_crime(self, ctx):
+        """Risk money for a chance at big rewards"""
+        # Reject spam from memory, before touching the profile
+        remaining = int(main.cooldowns.remaining(ctx.author.id, 'crime'))
+        if remaining > 0:
+            await main.send(ctx, f"🚔 You need to lay low for {remaining//60}m {remaining%60}s!")
+            return
+        
+        dice = main.rng.user(ctx.author.id)
+        async with main.user_locks.user(ctx.author.id):
+            profile = await main.get_user_profile(ctx.author.id)
+            
+            # Check cooldown (the profile is authoritative after a restart or in another process)
+            if profile.last_crime:
+                remaining = int(profile.last_crime + CRIME_COOLDOWN - time.time())
+                if remaining > 0:
+                    main.cooldowns.start(ctx.author.id, 'crime', remaining)
+                    await main.send(ctx, f"🚔 You need to lay low for {remaining//60}m {remaining%60}s!")
+                    return
+            
+            # Start the cooldown now, unless another worker just did
+            remaining = await main.cooldowns.claim(ctx.author.id, 'crime', CRIME_COOLDOWN)
+            if remaining > 0:
+                remaining = int(remaining)
+                await main.send(ctx, f"🚔 You need to lay low for {remaining//60}m {remaining%60}s!")
+                return
+            
+            success_rate = 0.6  # 60% success rate
+            
+            if dice.random() < success_rate:
+                # Success
+                earnings = dice.randint(50, 200) + (profile.level * 10)
+                main.change_money(ctx.author.id, profile, earnings, 'crime')
+                profile.experience += dice.randint(10, 25)
+            
+                embed = build_embed(
+                    CRIME_SUCCESS_TEMPLATE,
+                    [field("💰 Earned", f"${earnings}"), field("💳 Total Money", f"${profile.money:,}")],
+                    description=f"You {dice.choice(CRIMES)} and got away with it!"
+                )
+            
+            else:
+                # Failure
+                fine = min(profile.money // 4, 100)  # Lose up to 25% or $100, whichever is less
+                main.change_money(ctx.author.id, profile, -fine, 'crime_fine')
+            
+                embed = build_embed(
+                    CRIME_FAILURE_TEMPLATE,
+                    [field("💸 Fine", f"${fine}"), field("💳 Total Money", f"${profile.money:,}")]
+                )
+            
+            profile.last_crime = int(time.time())
+            main.save_user_profile(ctx.author.id, profile)
+        
+        await main.send(ctx, embed=embed)
+
+    @commands.command(name='achievements')
+    async def show_achievements(self, ctx, member: discord.Member = None):
+        """Show which achievements you or someone else has earned"""
+        target = member or ctx.author
+        profile = await main.get_user_profile(target.id)
+        
+        earned = set(profile.achievements)
+        lines = [
+            f"{'✅' if achievement.name in earned else '🔒'} **{achievement.name}** - {achievement.description}"
+            for achievement in main.achievement_engine.achievements
+        ]
+        total = len(main.achievement_engine.achievements)
+        done = sum(1 for achievement in main.achievement_engine.achievements if achievement.name in earned)
+        
+        embed = build_embed(
+            ACHIEVEMENTS_TEMPLATE,
+            title=f"🏅 {target.display_name}'s Achievements ({done}/{total})",
+            description='\n'.join(lines)
+        )
+        await main.send(ctx, embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Economy())
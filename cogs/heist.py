@@ -0,0 +1,49 @@
+from discord.ext import commands
+
+import main
+
+
+class Heists(commands.Cog):
+    """Planning and joining group heists; main.resolve_heist runs them when the lobby closes"""
+
+    @commands.command(name='heist')
+    async def heist(self, ctx):
+        """Plan a group heist, or join the one being planned in this channel"""
+        await self.start_or_join(ctx, premium=False)
+
+    @commands.command(name='premiumheist')
+    async def premium_heist(self, ctx):
+        """Plan a safer, double-payout heist (premium only)"""
+        await self.start_or_join(ctx, premium=True)
+
+    async def start_or_join(self, ctx, premium):
+        remaining = int(await main.cooldowns.fetch(ctx.author.id, 'heist'))
+        if remaining > 0:
+            await main.send(ctx, f"🚔 The cops are still looking for you! Wait {remaining//60}m {remaining%60}s.")
+            return
+        if main.heists.busy(ctx.author.id):
+            await main.send(ctx, "❌ You're already in a heist crew!")
+            return
+        
+        lobby = main.heists.lobby(ctx.channel.id)
+        if lobby is not None:
+            if main.heists.join(ctx.channel.id, ctx.author.id):
+                await main.send(ctx, f"🦹 {ctx.author.mention} joined the heist! Crew size: {len(lobby.members)}")
+            else:
+                await main.send(ctx, "❌ The heist crew is full!")
+            return
+        
+        if premium and not main.is_premium(await main.get_user_profile(ctx.author.id)):
+            await main.send(ctx, "👑 Only premium players can plan a premium heist! Use `!buypremium`.")
+            return
+        lobby = main.heists.open(ctx.channel, ctx.author.id, premium)
+        if lobby is None:
+            await main.send(ctx, "❌ Too many heists are being planned right now, try again soon!")
+            return
+        kind = "premium heist" if premium else "heist"
+        await main.send(ctx, f"🦹 {ctx.author.mention} is planning a {kind}! Type `!heist` in the next "
+                             f"{int(main.heists.join_window)} seconds to join the crew.")
+
+
+async def setup(bot):
+    await bot.add_cog(Heists())
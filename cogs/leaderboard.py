@@ -0,0 +1,66 @@
+import discord
+from discord.ext import commands
+
+import main
+from templates import field, build_embed, MONEY_LEADERBOARD_TEMPLATE, LEVEL_LEADERBOARD_TEMPLATE, RANK_TEMPLATE
+
+
+class Leaderboard(commands.Cog):
+    """Leaderboards served from the sorted indexes in main"""
+
+    @commands.command(name='leaderboard', aliases=['lb', 'top'])
+    async def leaderboard(self, ctx, board: str = 'money'):
+        """Show the richest or highest level players"""
+        if board.lower() == 'level':
+            index, template, fmt = main.level_index, LEVEL_LEADERBOARD_TEMPLATE, lambda score: f"Level {score}"
+        else:
+            index, template, fmt = main.money_index, MONEY_LEADERBOARD_TEMPLATE, lambda score: f"${score:,}"
+        
+        if not main.indexes_loaded:
+            await main.send(ctx, "⏳ The leaderboard is still loading, try again in a moment!")
+            return
+        
+        top_players = index.top(10)
+        if not top_players:
+            await main.send(ctx, "📭 Nobody is on the leaderboard yet! Use `!work` to get started.")
+            return
+        
+        medals = ['🥇', '🥈', '🥉']
+        lines = []
+        for position, (user_id, score) in enumerate(top_players, start=1):
+            prefix = medals[position - 1] if position <= len(medals) else f"**{position}.**"
+            lines.append(f"{prefix} <@{user_id}> - {fmt(score)}")
+        
+        rank = index.rank(ctx.author.id)
+        if rank:
+            footer = f"Your rank: #{rank} of {len(index)}"
+        else:
+            footer = "You're not ranked yet - use !work to get started!"
+        embed = build_embed(template, description='\n'.join(lines), footer={'text': footer})
+        
+        await main.send(ctx, embed=embed)
+
+    @commands.command(name='rank')
+    async def show_rank(self, ctx, member: discord.Member = None):
+        """Show your or someone else's leaderboard rank"""
+        target = member or ctx.author
+        if not main.indexes_loaded:
+            await main.send(ctx, "⏳ The leaderboard is still loading, try again in a moment!")
+            return
+        
+        money_rank = main.money_index.rank(target.id)
+        if money_rank is None:
+            await main.send(ctx, f"📭 {target.display_name} isn't ranked yet!")
+            return
+        
+        fields = [
+            field("💰 Money Rank", f"#{money_rank} of {len(main.money_index)}"),
+            field("📊 Level Rank", f"#{main.level_index.rank(target.id)} of {len(main.level_index)}")
+        ]
+        embed = build_embed(RANK_TEMPLATE, fields, title=f"🏆 {target.display_name}'s Rank")
+        
+        await main.send(ctx, embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Leaderboard())
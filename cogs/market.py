@@ -0,0 +1,113 @@
+import math
+import os
+
+from discord.ext import commands
+
+import main
+from market import MarketSimulator, TICKERS, STOCK_NAMES
+from templates import field, build_embed, STOCKS_TEMPLATE
+
+
+class Market(commands.Cog):
+    """Stock market commands; loaded after the bot is ready (see main.warm_up)"""
+
+    def __init__(self, market):
+        self.market = market
+
+    async def cog_load(self):
+        await self.market.load()
+        self.market.start()
+
+    async def cog_unload(self):
+        await self.market.close()
+
+    @commands.command(name='stocks')
+    async def show_stocks(self, ctx):
+        """Show current stock prices and your portfolio"""
+        quotes = self.market.quotes
+        profile = await main.get_user_profile(ctx.author.id)
+        
+        lines = []
+        for ticker in TICKERS:
+            change = quotes.change(ticker)
+            arrow = '📈' if change >= 0 else '📉'
+            owned = profile.stocks.get(ticker, 0)
+            line = f"{arrow} **{ticker}** ({STOCK_NAMES[ticker]}) - ${quotes.prices[ticker]:,.2f} ({change:+.2%})"
+            if owned:
+                line += f" - you own {owned:,}"
+            lines.append(line)
+        
+        fields = []
+        if profile.stocks:
+            value = self.market.value_portfolios({ctx.author.id: profile.stocks})[ctx.author.id]
+            fields.append(field("💼 Portfolio Value", f"${value:,}", inline=False))
+        
+        embed = build_embed(STOCKS_TEMPLATE, fields, description='\n'.join(lines))
+        await main.send(ctx, embed=embed)
+
+    @commands.command(name='invest')
+    async def invest(self, ctx, stock: str, shares: int):
+        """Buy shares at the current market price"""
+        ticker = stock.upper()
+        if ticker not in STOCK_NAMES:
+            await main.send(ctx, f"❌ Unknown stock `{stock}`! Choose from {', '.join(TICKERS)}.")
+            return
+        if shares <= 0:
+            await main.send(ctx, "❌ You must buy at least 1 share!")
+            return
+        
+        price = self.market.quotes.prices[ticker]
+        cost = math.ceil(price * shares)
+        
+        async with main.user_locks.user(ctx.author.id):
+            profile = await main.get_user_profile(ctx.author.id)
+            if profile.money < cost:
+                await main.send(ctx, f"❌ {shares:,} {ticker} costs ${cost:,} but you only have ${profile.money:,}!")
+                return
+            
+            main.change_money(ctx.author.id, profile, -cost, 'invest')
+            profile.stocks[ticker] = profile.stocks.get(ticker, 0) + shares
+            main.achievement_engine.evaluate(profile, ('stocks',))
+            main.save_user_profile(ctx.author.id, profile)
+        
+        await main.send(ctx, f"📈 Bought {shares:,} {ticker} at ${price:,.2f} for ${cost:,}! You now own {profile.stocks[ticker]:,}.")
+
+    @commands.command(name='sell')
+    async def sell(self, ctx, stock: str, shares: int):
+        """Sell shares at the current market price"""
+        ticker = stock.upper()
+        if ticker not in STOCK_NAMES:
+            await main.send(ctx, f"❌ Unknown stock `{stock}`! Choose from {', '.join(TICKERS)}.")
+            return
+        if shares <= 0:
+            await main.send(ctx, "❌ You must sell at least 1 share!")
+            return
+        
+        price = self.market.quotes.prices[ticker]
+        proceeds = int(price * shares)
+        
+        async with main.user_locks.user(ctx.author.id):
+            profile = await main.get_user_profile(ctx.author.id)
+            owned = profile.stocks.get(ticker, 0)
+            if owned < shares:
+                await main.send(ctx, f"❌ You only own {owned:,} {ticker}!")
+                return
+            
+            main.change_money(ctx.author.id, profile, proceeds, 'sell')
+            if owned == shares:
+                del profile.stocks[ticker]
+            else:
+                profile.stocks[ticker] = owned - shares
+            main.save_user_profile(ctx.author.id, profile)
+        
+        await main.send(ctx, f"📉 Sold {shares:,} {ticker} at ${price:,.2f} for ${proceeds:,}!")
+
+
+async def setup(bot):
+    # Only the primary worker simulates; the others follow its saved prices
+    market = MarketSimulator(
+        tick_seconds=float(os.getenv("MARKET_TICK", "60")),
+        storage=main.storage,
+        follower=not main.PRIMARY_WORKER
+    )
+    await bot.add_cog(Market(market))
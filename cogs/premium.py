@@ -0,0 +1,49 @@
+import time
+
+from discord.ext import commands
+
+import main
+from templates import PREMIUM_PLANS
+
+
+class Premium(commands.Cog):
+    """Buying premium plans"""
+
+    @commands.command(name='buypremium')
+    async def buy_premium(self, ctx, plan: str):
+        """Buy a premium plan"""
+        plan = plan.lower()
+        if plan not in PREMIUM_PLANS:
+            await main.send(ctx, f"❌ Unknown plan `{plan}`! Choose from {', '.join(PREMIUM_PLANS)}.")
+            return
+        price, days = PREMIUM_PLANS[plan]
+        
+        async with main.user_locks.user(ctx.author.id):
+            profile = await main.get_user_profile(ctx.author.id)
+            if main.is_premium(profile) and not profile.premium_expires:
+                await main.send(ctx, "👑 You already have lifetime premium!")
+                return
+            if profile.money < price:
+                await main.send(ctx, f"❌ The {plan} plan costs ${price:,} but you only have ${profile.money:,}!")
+                return
+            
+            if days is None:
+                expires = None
+                await main.scheduler.cancel('premium', ctx.author.id)
+            else:
+                # Buying again extends the current plan
+                start = profile.premium_expires if main.is_premium(profile) else time.time()
+                expires = int(start + days * 24 * 60 * 60)
+                await main.scheduler.schedule('premium', ctx.author.id, expires)
+            
+            main.change_money(ctx.author.id, profile, -price, 'premium')
+            profile.premium = True
+            profile.premium_expires = expires
+            main.achievement_engine.evaluate(profile, ('premium',))
+            main.save_user_profile(ctx.author.id, profile)
+        
+        await main.send(ctx, f"👑 You bought {plan} premium for ${price:,}! Status: {main.format_premium_status(profile)}")
+
+
+async def setup(bot):
+    await bot.add_cog(Premium())
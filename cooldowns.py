@@ -0,0 +1,133 @@
+import heapq
+import time
+
+CRIME_COOLDOWN = 10 * 60
+HEIST_COOLDOWN = 30 * 60
+
+
+def work_cooldown(profile, premium):
+    """Work cooldown in seconds: 5 minutes, 3 with a car, halved for premium"""
+    minutes = 5
+
+    # Car reduces cooldown
+    if 'car' in profile.inventory:
+        minutes = 3
+
+    # Premium reduces cooldown by 50%
+    if premium:
+        minutes = int(minutes * 0.5)
+
+    return minutes * 60
+
+
+class CooldownService:
+    """In-memory cooldowns keyed by (user_id, action).
+
+    Expiries use the monotonic clock, so rejecting a spammer is a dict
+    lookup with no profile load. A min-heap of expiries lets expired
+    entries be evicted in order without scanning everything.
+
+    When several processes share storage, pass it in and use claim(),
+    fetch() and share(): the expiry is then also stored (as wall-clock
+    epoch seconds under cooldown_{action}_{user_id}) and claimed with a
+    compare-and-swap, so only one process can start a cooldown and the
+    others reject the action until it runs out. Memory still answers
+    every repeat rejection.
+    """
+
+    MAX_CLAIM_ATTEMPTS = 5
+
+    def __init__(self, clock=time.monotonic, storage=None, wall_clock=time.time, key_prefix='cooldown_'):
+        self.clock = clock
+        self.storage = storage
+        self.wall_clock = wall_clock
+        self.key_prefix = key_prefix
+        self._expiries = {}  # (user_id, action) -> monotonic expiry
+        self._heap = []  # (expiry, user_id, action), may hold stale entries
+
+    def __len__(self):
+        return len(self._expiries)
+
+    def start(self, user_id, action, seconds):
+        """Put user_id's action on cooldown for the given number of seconds"""
+        now = self.clock()
+        self._evict(now)
+        if seconds <= 0:
+            self._expiries.pop((str(user_id), action), None)
+            return
+        key = (str(user_id), action)
+        expiry = now + seconds
+        self._expiries[key] = expiry
+        heapq.heappush(self._heap, (expiry, key[0], action))
+
+    def remaining(self, user_id, action):
+        """Seconds left on the cooldown, or 0 if the action is allowed"""
+        expiry = self._expiries.get((str(user_id), action))
+        if expiry is None:
+            return 0
+        remaining = expiry - self.clock()
+        return remaining if remaining > 0 else 0
+
+    async def claim(self, user_id, action, seconds):
+        """Start the cooldown unless it's already running in this or another process.
+
+        Returns 0 if the caller now holds the cooldown and may go ahead,
+        otherwise the seconds left.
+        """
+        remaining = self.remaining(user_id, action)
+        if remaining > 0:
+            return remaining
+        if self.storage is not None:
+            key = self._key(user_id, action)
+            value, version = await self.storage.get_versioned(key)
+            for _ in range(self.MAX_CLAIM_ATTEMPTS):
+                remaining = self._left(value)
+                if remaining > 0:
+                    self.start(user_id, action, remaining)
+                    return remaining
+                _, conflicts = await self.storage.compare_and_put_many(
+                    [(key, str(self.wall_clock() + seconds))], {key: version}
+                )
+                if not conflicts:
+                    break
+                value, version = conflicts[key]
+            else:
+                raise RuntimeError(f"Cooldown {key} kept changing in another process")
+        self.start(user_id, action, seconds)
+        return 0
+
+    async def fetch(self, user_id, action):
+        """Like remaining(), but also sees cooldowns other processes started"""
+        remaining = self.remaining(user_id, action)
+        if remaining > 0 or self.storage is None:
+            return remaining
+        remaining = self._left(await self.storage.get(self._key(user_id, action)))
+        if remaining > 0:
+            self.start(user_id, action, remaining)
+        return remaining
+
+    async def share(self, user_ids, action, seconds):
+        """Start the cooldown for every user, here and for the other processes"""
+        for user_id in user_ids:
+            self.start(user_id, action, seconds)
+        if self.storage is not None:
+            expiry = str(self.wall_clock() + seconds)
+            await self.storage.put_many([(self._key(user_id, action), expiry) for user_id in user_ids])
+
+    def _key(self, user_id, action):
+        return f"{self.key_prefix}{action}_{user_id}"
+
+    def _left(self, value):
+        if not value:
+            return 0
+        remaining = float(value) - self.wall_clock()
+        return remaining if remaining > 0 else 0
+
+    def _evict(self, now):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expiry, user_id, action = heapq.heappop(heap)
+            key = (user_id, action)
+            # Skip heap entries superseded by a later start()
+            if self._expiries.get(key) == expiry:
+                del self._expiries[key]
@@ -0,0 +1,257 @@
+"""Stream profiles out of and into storage, and migrate them in place.
+
+    python datatool.py export profiles.ndjson
+    python datatool.py export profiles.bin --format binary
+    python datatool.py import profiles.ndjson
+    python datatool.py migrate
+    python datatool.py award                # after adding achievements
+
+Everything streams: profiles are read one storage page or file record at
+a time and written in put_many batches, so memory use stays flat however
+many profiles there are. Run it while the bot is stopped.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import struct
+import sys
+import time
+
+from achievements import AchievementEngine
+from models import Profile, PROFILE_VERSION, encode_profile, decode_profile
+from storage import create_storage
+
+KEY_PREFIX = 'user_'
+
+# Binary export: magic, then (user_id length, profile length, user_id, encoded profile) records
+BINARY_MAGIC = b'PTRPROF1'
+_BINARY_RECORD = struct.Struct('<HI')
+
+
+class Progress:
+    """Prints a running count and rate to stderr at most every interval seconds"""
+
+    def __init__(self, label, interval=1.0):
+        self.label = label
+        self.interval = interval
+        self.count = 0
+        self.skipped = 0
+        self._started = time.perf_counter()
+        self._printed = self._started
+
+    def _print(self, end):
+        elapsed = time.perf_counter() - self._started
+        rate = self.count / elapsed if elapsed > 0 else 0
+        skipped = f", {self.skipped:,} skipped" if self.skipped else ""
+        print(f"\r{self.label}: {self.count:,} profiles ({rate:,.0f}/s){skipped}", end=end, file=sys.stderr)
+
+    def advance(self, amount=1):
+        self.count += amount
+        now = time.perf_counter()
+        if now - self._printed >= self.interval:
+            self._printed = now
+            self._print('')
+
+    def done(self):
+        self._print('\n')
+
+
+def _skip(progress, where, error):
+    progress.skipped += 1
+    print(f"\nSkipping {where}: {error}", file=sys.stderr)
+
+
+async def iter_profiles(storage, progress):
+    """Yield (user_id, Profile) for every stored profile, skipping unreadable ones"""
+    async for key, value in storage.scan(KEY_PREFIX):
+        try:
+            profile = decode_profile(value)
+        except ValueError as e:
+            _skip(progress, key, e)
+            continue
+        yield key[len(KEY_PREFIX):], profile
+
+
+def read_ndjson(path, progress):
+    """Yield (user_id, Profile) for every line, skipping lines that don't parse"""
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                user_id, profile = str(record['user_id']), Profile.from_dict(record['profile'])
+            except KeyError as e:
+                _skip(progress, f"line {number}", f"missing {e}")
+                continue
+            except (ValueError, TypeError) as e:
+                _skip(progress, f"line {number}", e)
+                continue
+            yield user_id, profile
+
+
+def read_binary(path, progress):
+    """Yield (user_id, Profile) for every record, skipping ones that don't decode"""
+    with open(path, 'rb') as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary profile export")
+        for number in itertools.count(1):
+            header = f.read(_BINARY_RECORD.size)
+            if not header:
+                return
+            if len(header) == _BINARY_RECORD.size:
+                key_length, value_length = _BINARY_RECORD.unpack(header)
+                key = f.read(key_length)
+                value = f.read(value_length)
+            if len(header) < _BINARY_RECORD.size or len(key) < key_length or len(value) < value_length:
+                # Nothing after a cut-off record can be framed
+                _skip(progress, f"record {number}", "file ends mid-record")
+                return
+            try:
+                user_id, profile = key.decode('utf-8'), decode_profile(value)
+            except ValueError as e:
+                _skip(progress, f"record {number}", e)
+                continue
+            yield user_id, profile
+
+
+def detect_format(path):
+    with open(path, 'rb') as f:
+        return 'binary' if f.read(len(BINARY_MAGIC)) == BINARY_MAGIC else 'ndjson'
+
+
+async def export_profiles(storage, path, fmt):
+    progress = Progress("Exported")
+    if fmt == 'binary':
+        with open(path, 'wb') as f:
+            f.write(BINARY_MAGIC)
+            async for user_id, profile in iter_profiles(storage, progress):
+                key = user_id.encode('utf-8')
+                value = encode_profile(profile)
+                f.write(_BINARY_RECORD.pack(len(key), len(value)))
+                f.write(key)
+                f.write(value)
+                progress.advance()
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            async for user_id, profile in iter_profiles(storage, progress):
+                f.write(json.dumps({'user_id': user_id, 'profile': profile.to_dict()}, separators=(',', ':')))
+                f.write('\n')
+                progress.advance()
+    progress.done()
+
+
+async def write_batches(storage, items, progress, batch_size, dry_run=False):
+    """Write an async stream of (key, value) pairs with one put_many per batch_size"""
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            if not dry_run:
+                await storage.put_many(batch)
+            progress.advance(len(batch))
+            batch = []
+    if batch:
+        if not dry_run:
+            await storage.put_many(batch)
+        progress.advance(len(batch))
+    progress.done()
+
+
+async def import_profiles(storage, path, batch_size):
+    reader = read_binary if detect_format(path) == 'binary' else read_ndjson
+
+    progress = Progress("Imported")
+
+    async def records():
+        for user_id, profile in reader(path, progress):
+            yield f"{KEY_PREFIX}{user_id}", encode_profile(profile)
+
+    await write_batches(storage, records(), progress, batch_size)
+
+
+def _is_current(value):
+    if isinstance(value, str):
+        return False
+    return bool(value) and value[0] == PROFILE_VERSION
+
+
+async def migrate_profiles(storage, batch_size, dry_run=False):
+    """Rewrite every profile not already in the current format.
+
+    Decoding fills in defaults for fields older profiles lack, so
+    re-encoding stores them in full. Scans page by key, so rewriting
+    rows that were already scanned is safe.
+    """
+    progress = Progress("Migrated" if not dry_run else "Would migrate")
+
+    async def outdated():
+        async for key, value in storage.scan(KEY_PREFIX):
+            if _is_current(value):
+                continue
+            try:
+                profile = decode_profile(value)
+            except ValueError as e:
+                _skip(progress, key, e)
+                continue
+            yield key, encode_profile(profile)
+
+    await write_batches(storage, outdated(), progress, batch_size, dry_run)
+
+
+async def award_achievements(storage, batch_size, dry_run=False):
+    """Check every achievement rule against every profile and save the ones that earned something"""
+    engine = AchievementEngine()
+    progress = Progress("Awarded" if not dry_run else "Would award")
+
+    async def awarded():
+        async for user_id, profile in iter_profiles(storage, progress):
+            if engine.evaluate_all(profile):
+                yield f"{KEY_PREFIX}{user_id}", encode_profile(profile)
+
+    await write_batches(storage, awarded(), progress, batch_size, dry_run)
+
+
+async def run(args):
+    storage = create_storage(os.getenv("STORAGE_BACKEND"), args.db)
+    try:
+        if args.command == 'export':
+            await export_profiles(storage, args.path, args.format)
+        elif args.command == 'import':
+            await import_profiles(storage, args.path, args.batch_size)
+        elif args.command == 'migrate':
+            await migrate_profiles(storage, args.batch_size, args.dry_run)
+        else:
+            await award_achievements(storage, args.batch_size, args.dry_run)
+    finally:
+        await storage.close()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Export, import and migrate stored profiles")
+    parser.add_argument('--db', default=os.getenv('DB_PATH'), help="SQLite database (default DB_PATH or bot.db)")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subcommands.add_parser('export', help="write every profile to a file")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--format', choices=('ndjson', 'binary'), default='ndjson')
+
+    import_parser = subcommands.add_parser('import', help="load profiles from an export (format is detected)")
+    import_parser.add_argument('path')
+    import_parser.add_argument('--batch-size', type=int, default=1000, help="profiles per storage write")
+
+    migrate_parser = subcommands.add_parser('migrate', help="rewrite old-format profiles in the current format")
+    migrate_parser.add_argument('--batch-size', type=int, default=1000, help="profiles per storage write")
+    migrate_parser.add_argument('--dry-run', action='store_true', help="only count what would be rewritten")
+
+    award_parser = subcommands.add_parser('award', help="award achievements players already qualify for")
+    award_parser.add_argument('--batch-size', type=int, default=1000, help="profiles per storage write")
+    award_parser.add_argument('--dry-run', action='store_true', help="only count who would earn something")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from collections import deque
+
+from metrics import registry
+
+# Discord message limits
+MAX_CONTENT = 2000
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+
+send_latency = registry.histogram('discord_send_seconds', 'Latency of messages sent to Discord')
+queued_messages = registry.counter('dispatch_queued_total', 'Replies queued for sending')
+sent_messages = registry.counter('dispatch_sent_total', 'Messages actually sent to Discord')
+coalesced_messages = registry.counter('dispatch_coalesced_total', 'Replies merged into an earlier message')
+dropped_messages = registry.counter('dispatch_dropped_total', 'Replies dropped because a channel queue was full')
+failed_messages = registry.counter('dispatch_failed_total', 'Messages Discord rejected')
+
+
+class TokenBucket:
+    """Allows capacity sends at once, refilling at rate sends per second"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self):
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill()
+        return 0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self._tokens -= 1
+
+
+class _Channel:
+    __slots__ = ('channel', 'queue', 'bucket', 'task')
+
+    def __init__(self, channel, bucket):
+        self.channel = channel
+        self.queue = deque()
+        self.bucket = bucket
+        self.task = None
+
+
+class Dispatcher:
+    """Outbound message queue with per-channel rate budgets.
+
+    Replies are queued per channel and sent by one worker per busy
+    channel. A worker waits for both the channel's and the global token
+    bucket before sending, and whatever piled up meanwhile is coalesced
+    into as few messages as Discord's size limits allow. Idle channels
+    hold no state.
+    """
+
+    def __init__(self, channel_rate=1.0, channel_burst=5, global_rate=45.0, global_burst=45, max_queue=50):
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.max_queue = max_queue
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._channels = {}
+
+    @property
+    def queue_depth(self):
+        return sum(len(state.queue) for state in self._channels.values())
+
+    def send(self, channel, content=None, embed=None):
+        """Queue a message for channel; returns immediately"""
+        state = self._channels.get(channel.id)
+        if state is None:
+            state = self._channels[channel.id] = _Channel(channel, TokenBucket(self.channel_rate, self.channel_burst))
+        if len(state.queue) >= self.max_queue:
+            dropped_messages.inc()
+            return
+        state.queue.append((content, embed))
+        queued_messages.inc()
+        if state.task is None:
+            state.task = asyncio.create_task(self._drain(channel.id, state))
+
+    async def _drain(self, channel_id, state):
+        try:
+            while state.queue:
+                # Wait on both budgets; replies queued meanwhile get coalesced
+                while True:
+                    delay = max(state.bucket.delay(), self.global_bucket.delay())
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                state.bucket.take()
+                self.global_bucket.take()
+
+                content, embeds = self._take_batch(state.queue)
+                try:
+                    with send_latency.time():
+                        await state.channel.send(content=content, embeds=embeds)
+                    sent_messages.inc()
+                except Exception as e:
+                    failed_messages.inc()
+                    print(f"Error sending message: {e}")
+        finally:
+            self._channels.pop(channel_id, None)
+
+    def _take_batch(self, queue):
+        contents = []
+        content_length = 0
+        embeds = []
+        embed_chars = 0
+        taken = 0
+        while queue:
+            content, embed = queue[0]
+            extra = len(content) + (1 if contents else 0) if content else 0
+            size = len(embed) if embed is not None else 0
+            if taken and (
+                content_length + extra > MAX_CONTENT
+                or (embed is not None and (len(embeds) >= MAX_EMBEDS or embed_chars + size > MAX_EMBED_CHARS))
+            ):
+                break
+            queue.popleft()
+            taken += 1
+            if content:
+                contents.append(content)
+                content_length += extra
+            if embed is not None:
+                embeds.append(embed)
+                embed_chars += size
+        if taken > 1:
+            coalesced_messages.inc(amount=taken - 1)
+        return ('\n'.join(contents) or None), embeds
+
+    async def close(self, timeout=10.0):
+        """Wait for queued messages to go out"""
+        tasks = [state.task for state in self._channels.values() if state.task is not None]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
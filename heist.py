@@ -0,0 +1,90 @@
+import asyncio
+
+
+class Lobby:
+    __slots__ = ('channel', 'leader_id', 'premium', 'members', 'closes_at', 'timer')
+
+    def __init__(self, channel, leader_id, premium, closes_at):
+        self.channel = channel
+        self.leader_id = leader_id
+        self.premium = premium
+        self.members = [leader_id]
+        self.closes_at = closes_at
+        self.timer = None
+
+
+class HeistManager:
+    """Open heist lobbies, at most one per channel.
+
+    A lobby's join window is a single loop.call_at() timer rather than a
+    sleeping task, so an idle lobby costs one small object and one timer
+    handle. When the window closes the lobby is removed and
+    on_resolve(lobby) runs as a task. max_lobbies and max_crew bound
+    memory however many guilds start heists at once.
+    """
+
+    def __init__(self, on_resolve, join_window=60.0, max_lobbies=1000, max_crew=10):
+        self.on_resolve = on_resolve
+        self.join_window = join_window
+        self.max_lobbies = max_lobbies
+        self.max_crew = max_crew
+        self._lobbies = {}  # channel id -> Lobby
+        self._members = {}  # user id -> channel id of the lobby they're in
+        self._resolving = set()
+
+    def __len__(self):
+        return len(self._lobbies)
+
+    def lobby(self, channel_id):
+        return self._lobbies.get(channel_id)
+
+    def open(self, channel, leader_id, premium=False):
+        """Start a lobby in channel; returns it, or None if one is open or we're at capacity"""
+        leader_id = str(leader_id)
+        if channel.id in self._lobbies or leader_id in self._members or len(self._lobbies) >= self.max_lobbies:
+            return None
+        loop = asyncio.get_running_loop()
+        lobby = Lobby(channel, leader_id, premium, loop.time() + self.join_window)
+        lobby.timer = loop.call_at(lobby.closes_at, self._close, channel.id)
+        self._lobbies[channel.id] = lobby
+        self._members[leader_id] = channel.id
+        return lobby
+
+    def join(self, channel_id, user_id):
+        """Add user_id to the channel's lobby; returns False if that isn't possible"""
+        user_id = str(user_id)
+        lobby = self._lobbies.get(channel_id)
+        if lobby is None or user_id in self._members or len(lobby.members) >= self.max_crew:
+            return False
+        lobby.members.append(user_id)
+        self._members[user_id] = channel_id
+        return True
+
+    def busy(self, user_id):
+        """Whether user_id is already in an open lobby"""
+        return str(user_id) in self._members
+
+    def _close(self, channel_id):
+        lobby = self._lobbies.pop(channel_id, None)
+        if lobby is None:
+            return
+        for user_id in lobby.members:
+            self._members.pop(user_id, None)
+        task = asyncio.create_task(self._resolve(lobby))
+        self._resolving.add(task)
+        task.add_done_callback(self._resolving.discard)
+
+    async def _resolve(self, lobby):
+        try:
+            await self.on_resolve(lobby)
+        except Exception as e:
+            print(f"Error resolving heist in channel {lobby.channel.id}: {e}")
+
+    async def close(self):
+        """Call off open lobbies and wait for heists already resolving"""
+        for lobby in self._lobbies.values():
+            lobby.timer.cancel()
+        self._lobbies.clear()
+        self._members.clear()
+        if self._resolving:
+            await asyncio.wait(list(self._resolving))
@@ -1,15 +1,52 @@
-from flask import Flask
-from threading import Thread
+import asyncio
+from aiohttp import web
+from metrics import registry
 
-app = Flask('')
+# How long /health waits on storage before calling it unreachable
+STORAGE_TIMEOUT = 2.0
 
-@app.route('/')
-def home():
-    return "I'm alive!"
+async def home(request):
+    return web.Response(text="I'm alive!")
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
+async def metrics(request):
+    return web.Response(text=registry.render(), content_type='text/plain')
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+async def health(request):
+    """Readiness: 200 when the gateway is connected, storage answers and warm-up didn't fail, else 503"""
+    bot = request.app['bot']
+    storage = request.app['storage']
+    profile_cache = request.app['profile_cache']
+    warm_up_failed = request.app['warm_up_failed']
+    
+    gateway_connected = bot.is_ready() and not bot.is_closed()
+    try:
+        await asyncio.wait_for(storage.get('__health__'), STORAGE_TIMEOUT)
+        storage_reachable = True
+    except Exception:
+        storage_reachable = False
+    
+    status = {
+        'ready': gateway_connected and storage_reachable and not warm_up_failed,
+        'gateway_connected': gateway_connected,
+        'gateway_latency': bot.latency if gateway_connected else None,
+        'storage_reachable': storage_reachable,
+        'flush_backlog': profile_cache.dirty_count,
+        'warm_up_failed': list(warm_up_failed)
+    }
+    return web.json_response(status, status=200 if status['ready'] else 503)
+
+async def keep_alive(bot, storage, profile_cache, host='0.0.0.0', port=8080, warm_up_failed=()):
+    """Serve health and metrics from the bot's own event loop; returns the runner to clean up"""
+    app = web.Application()
+    app['bot'] = bot
+    app['storage'] = storage
+    app['profile_cache'] = profile_cache
+    app['warm_up_failed'] = warm_up_failed  # read on every request, so the caller can append later
+    app.router.add_get('/', home)
+    app.router.add_get('/health', health)
+    app.router.add_get('/metrics', metrics)
+    
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
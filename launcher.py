@@ -0,0 +1,119 @@
+"""Run the bot as several processes, each owning a range of shards.
+
+    python launcher.py --workers 4            # shard count from Discord
+    python launcher.py --workers 2 --shards 8
+
+All workers share one SQLite database (DB_PATH) and keep their profile
+caches coherent through SYNC_INTERVAL. Crashed workers are restarted.
+
+What holds across workers: a profile write never overwrites another
+worker's. Each flush is a compare-and-swap on the profile's version, and
+on conflict the two versions are merged: money, item and share changes
+from both sides add up, cooldown timestamps take the later one.
+
+Cooldowns hold across workers too: !work, !crime and heist cooldowns
+are claimed in the database with a compare-and-swap, so a command runs
+on one worker only, and the others reject it until the cooldown ends.
+
+What doesn't: per-user locks are per process. A player whose commands
+reach two workers at once can pass a balance check on both, so a
+balance can briefly go negative. Each worker's transactions still land
+atomically, in one batch.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+import aiohttp
+
+GATEWAY_URL = 'https://discord.com/api/v10/gateway/bot'
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+
+async def recommended_shards(token):
+    """Ask Discord how many shards the bot should run"""
+    headers = {'Authorization': f'Bot {token}'}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers=headers) as response:
+            response.raise_for_status()
+            return (await response.json())['shards']
+
+
+def split_shards(shard_count, workers):
+    """Split shard ids 0..shard_count-1 into contiguous, near-equal ranges"""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges = []
+    start = 0
+    for worker in range(workers):
+        end = start + size + (1 if worker < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+async def run_worker(worker_id, shard_ids, shard_count, args, stopping):
+    env = dict(os.environ)
+    env.update({
+        'SHARD_IDS': ','.join(map(str, shard_ids)),
+        'SHARD_COUNT': str(shard_count),
+        'PORT': str(args.base_port + worker_id),
+        'SYNC_INTERVAL': env.get('SYNC_INTERVAL', str(args.sync_interval)),
+        'FLUSH_INTERVAL': env.get('FLUSH_INTERVAL', str(args.flush_interval)),
+    })
+    backoff = 1
+    while not stopping.is_set():
+        print(f"[launcher] worker {worker_id}: starting shards {shard_ids[0]}-{shard_ids[-1]} of {shard_count}")
+        process = await asyncio.create_subprocess_exec(sys.executable, MAIN, env=env)
+        stop_waiter = asyncio.create_task(stopping.wait())
+        exit_waiter = asyncio.create_task(process.wait())
+        await asyncio.wait({stop_waiter, exit_waiter}, return_when=asyncio.FIRST_COMPLETED)
+
+        if stopping.is_set():
+            if process.returncode is None:
+                process.send_signal(signal.SIGINT)
+                try:
+                    await asyncio.wait_for(process.wait(), args.shutdown_timeout)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+            exit_waiter.cancel()
+            return
+
+        stop_waiter.cancel()
+        print(f"[launcher] worker {worker_id} exited with {process.returncode}, restarting in {backoff}s")
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 60)
+
+
+async def launch(args):
+    shard_count = args.shards or await recommended_shards(os.environ['TOKEN'])
+    ranges = split_shards(shard_count, args.workers)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    await asyncio.gather(*[
+        run_worker(worker_id, shard_ids, shard_count, args, stopping)
+        for worker_id, shard_ids in enumerate(ranges)
+    ])
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Run the bot across several shard worker processes")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument('--shards', type=int, default=None, help="total shard count (default: ask Discord)")
+    parser.add_argument('--base-port', type=int, default=int(os.getenv('PORT', '8080')),
+                        help="health server port of worker 0; worker N uses base + N")
+    parser.add_argument('--sync-interval', type=float, default=1.0, help="seconds between cache coherence checks")
+    parser.add_argument('--flush-interval', type=float, default=1.0, help="seconds between profile flushes")
+    parser.add_argument('--shutdown-timeout', type=float, default=30.0, help="seconds to wait for a worker to stop")
+    asyncio.run(launch(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,72 @@
+from bisect import bisect_left, insort
+
+
+class LeaderboardIndex:
+    """Sorted index of users by a numeric profile score, highest first.
+
+    Entries are kept in a sorted list of (-score, user_id), so rank and
+    top-N lookups are a binary search instead of decoding every profile.
+    """
+
+    def __init__(self, score):
+        self.score = score  # profile -> number
+        self._order = []
+        self._scores = {}
+
+    def __len__(self):
+        return len(self._order)
+
+    def update(self, user_id, profile):
+        user_id = str(user_id)
+        new_score = self.score(profile)
+        old_score = self._scores.get(user_id)
+        if old_score == new_score:
+            return
+        if old_score is not None:
+            self._discard(user_id, old_score)
+        self._scores[user_id] = new_score
+        insort(self._order, (-new_score, user_id))
+
+    def _discard(self, user_id, score):
+        i = bisect_left(self._order, (-score, user_id))
+        if i < len(self._order) and self._order[i] == (-score, user_id):
+            del self._order[i]
+
+    def top(self, n=10):
+        """Return [(user_id, score)] for the n highest scores"""
+        return [(user_id, -neg_score) for neg_score, user_id in self._order[:n]]
+
+    def rank(self, user_id):
+        """Return the 1-based rank of user_id, or None if it isn't indexed"""
+        user_id = str(user_id)
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return bisect_left(self._order, (-score, user_id)) + 1
+
+    def load(self, scores):
+        """Replace the index contents with {user_id: score} in one sort"""
+        self._scores = {str(user_id): score for user_id, score in scores.items()}
+        self._order = sorted((-score, user_id) for user_id, score in self._scores.items())
+
+
+async def rebuild_indexes(storage, decode, indexes, key_prefix='user_'):
+    """Repopulate indexes from every stored profile in a single scan.
+
+    Safe to run while commands keep updating the indexes: scores already
+    in an index come from profiles changed since it was empty (at boot),
+    which may not be flushed yet, so they win over what storage holds.
+    """
+    scores = [{} for _ in indexes]
+    async for key, value in storage.scan(key_prefix):
+        try:
+            profile = decode(value)
+        except ValueError:
+            continue
+        user_id = key[len(key_prefix):]
+        for index, index_scores in zip(indexes, scores):
+            index_scores[user_id] = index.score(profile)
+    for index, index_scores in zip(indexes, scores):
+        index_scores.update(index._scores)
+        index.load(index_scores)
+    return len(scores[0]) if scores else 0
@@ -0,0 +1,198 @@
+"""Append-only ledger of every money change.
+
+    python ledger.py --user 1234          # audit one player's history
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+import zlib
+
+# Reason codes are stored as integers; only ever append to this tuple
+REASONS = (
+    'unknown', 'work', 'crime', 'crime_fine', 'gift_sent', 'gift_received',
+    'invest', 'sell', 'admin', 'loan_given', 'loan_received', 'loan_repaid',
+    'loan_collected', 'loan_default', 'heist', 'import', 'premium',
+)
+_REASON_CODES = {reason: code for code, reason in enumerate(REASONS)}
+
+# seq, timestamp, user_id, delta, reason, crc32 of the preceding fields
+_RECORD = struct.Struct('<QqQqH2xI')
+_CRC_SPAN = _RECORD.size - 4
+RECORD_SIZE = _RECORD.size
+
+SEGMENT_SUFFIX = '.seg'
+
+
+class LedgerEvent:
+    __slots__ = ('seq', 'timestamp', 'user_id', 'delta', 'reason')
+
+    def __init__(self, seq, timestamp, user_id, delta, reason):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.user_id = user_id
+        self.delta = delta
+        self.reason = reason
+
+    def __repr__(self):
+        return f"LedgerEvent(seq={self.seq}, user_id={self.user_id}, delta={self.delta}, reason={self.reason!r})"
+
+
+class _Segment:
+    """One preallocated, memory-mapped log file; its name is its first seq"""
+
+    def __init__(self, path, first_seq, size):
+        self.path = path
+        self.first_seq = first_seq
+        self.capacity = size // RECORD_SIZE
+        with open(path, 'a+b') as f:
+            if os.fstat(f.fileno()).st_size < size:
+                f.truncate(size)
+            self.map = mmap.mmap(f.fileno(), size)
+        self.count = self._find_end()
+
+    def _valid(self, index):
+        offset = index * RECORD_SIZE
+        record = _RECORD.unpack_from(self.map, offset)
+        return record[0] == self.first_seq + index and record[5] == zlib.crc32(self.map[offset:offset + _CRC_SPAN])
+
+    def _find_end(self):
+        # Records are written contiguously, so binary search for the first empty or torn slot
+        low, high = 0, self.capacity
+        while low < high:
+            middle = (low + high) // 2
+            if self._valid(middle):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @property
+    def last_seq(self):
+        return self.first_seq + self.count - 1
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def append(self, timestamp, user_id, delta, code):
+        seq = self.first_seq + self.count
+        offset = self.count * RECORD_SIZE
+        _RECORD.pack_into(self.map, offset, seq, timestamp, user_id, delta, code, 0)
+        crc = zlib.crc32(self.map[offset:offset + _CRC_SPAN])
+        _RECORD.pack_into(self.map, offset, seq, timestamp, user_id, delta, code, crc)
+        self.count += 1
+        return seq
+
+    def records(self, start_seq=None):
+        start = 0 if start_seq is None else max(0, start_seq - self.first_seq)
+        view = memoryview(self.map)[start * RECORD_SIZE:self.count * RECORD_SIZE]
+        try:
+            yield from _RECORD.iter_unpack(view)
+        finally:
+            view.release()
+
+    def close(self):
+        self.map.close()
+
+
+class Ledger:
+    """Sequential log of (user, delta, reason, timestamp) events.
+
+    Events are appended to fixed-size memory-mapped segments, so a money
+    change costs one small in-place write. Stored profiles act as
+    snapshots: the profile cache records the last seq they include (the
+    checkpoint) in the same batch as the profiles, and on startup only
+    the events after it are replayed. Segments wholly before the
+    checkpoint are compacted away, keeping the newest retain_segments
+    for auditing.
+    """
+
+    def __init__(self, directory, segment_size=4 * 1024 * 1024, retain_segments=8):
+        self.directory = directory
+        self.segment_size = segment_size - segment_size % RECORD_SIZE
+        self.retain_segments = retain_segments
+        os.makedirs(directory, exist_ok=True)
+
+        self._segments = [
+            _Segment(os.path.join(directory, name), int(name[:-len(SEGMENT_SUFFIX)]), self.segment_size)
+            for name in sorted(os.listdir(directory)) if name.endswith(SEGMENT_SUFFIX)
+        ]
+        if not self._segments:
+            self._segments.append(self._new_segment(1))
+
+    def _new_segment(self, first_seq):
+        path = os.path.join(self.directory, f"{first_seq:020d}{SEGMENT_SUFFIX}")
+        return _Segment(path, first_seq, self.segment_size)
+
+    @property
+    def last_seq(self):
+        """Seq of the newest event, or 0 if the ledger is empty"""
+        active = self._segments[-1]
+        return active.last_seq if active.count else active.first_seq - 1
+
+    def append(self, user_id, delta, reason):
+        """Record a money change and return its seq"""
+        active = self._segments[-1]
+        if active.full:
+            active = self._new_segment(active.last_seq + 1)
+            self._segments.append(active)
+        return active.append(int(time.time()), int(user_id), int(delta), _REASON_CODES.get(reason, 0))
+
+    def events(self, since_seq=0, user_id=None):
+        """Yield events with seq > since_seq, oldest first, optionally for one user"""
+        user_id = int(user_id) if user_id is not None else None
+        for segment in self._segments:
+            if segment.count == 0 or segment.last_seq <= since_seq:
+                continue
+            for seq, timestamp, event_user, delta, code, _ in segment.records(since_seq + 1):
+                if user_id is None or event_user == user_id:
+                    yield LedgerEvent(seq, timestamp, event_user, delta, REASONS[code] if code < len(REASONS) else 'unknown')
+
+    def replay(self, since_seq):
+        """Sum money deltas per user for every event after since_seq"""
+        totals = {}
+        for segment in self._segments:
+            if segment.count == 0 or segment.last_seq <= since_seq:
+                continue
+            for _, _, user_id, delta, _, _ in segment.records(since_seq + 1):
+                totals[user_id] = totals.get(user_id, 0) + delta
+        return totals
+
+    def flush(self):
+        """Ask the OS to write appended events to disk"""
+        self._segments[-1].map.flush()
+
+    def checkpoint(self, seq):
+        """Note that profiles up to seq are stored; compacts old segments"""
+        covered = [segment for segment in self._segments[:-1] if segment.last_seq <= seq]
+        for segment in covered[:max(0, len(covered) - self.retain_segments)]:
+            segment.close()
+            os.remove(segment.path)
+            self._segments.remove(segment)
+
+    def close(self):
+        for segment in self._segments:
+            segment.map.flush()
+            segment.close()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Print ledger events")
+    parser.add_argument('--dir', default=os.getenv('LEDGER_DIR', 'ledger/main'), help="ledger directory")
+    parser.add_argument('--user', type=int, default=None, help="only show this user's events")
+    parser.add_argument('--since', type=int, default=0, help="only show events after this seq")
+    args = parser.parse_args()
+
+    ledger = Ledger(args.dir)
+    try:
+        for event in ledger.events(args.since, args.user):
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event.timestamp))
+            print(f"{event.seq:>10} {when} {event.user_id:>20} {event.delta:>+12,} {event.reason}")
+    finally:
+        ledger.close()
+
+
+if __name__ == '__main__':
+    main_cli()
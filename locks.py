@@ -0,0 +1,68 @@
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+
+class LockRegistry:
+    """Per-user asyncio locks for read-modify-write on profiles.
+
+    Locks are held in a WeakValueDictionary, so a lock only exists while
+    someone holds or waits on it and idle users cost no memory.
+    """
+
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+
+        # Contention stats
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_time = 0.0
+
+    def __len__(self):
+        return len(self._locks)
+
+    def _get_lock(self, user_id):
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[user_id] = lock
+        return lock
+
+    async def _acquire(self, lock):
+        self.acquisitions += 1
+        if lock.locked():
+            self.contended += 1
+            start = time.perf_counter()
+            await lock.acquire()
+            self.wait_time += time.perf_counter() - start
+        else:
+            await lock.acquire()
+
+    @asynccontextmanager
+    async def user(self, user_id):
+        """Hold one user's lock"""
+        lock = self._get_lock(str(user_id))
+        await self._acquire(lock)
+        try:
+            yield
+        finally:
+            lock.release()
+
+    @asynccontextmanager
+    async def transaction(self, *user_ids):
+        """Hold several users' locks at once.
+
+        Locks are always taken in sorted user_id order, so two transactions
+        over the same users can never deadlock each other.
+        """
+        locks = [self._get_lock(user_id) for user_id in sorted({str(user_id) for user_id in user_ids})]
+        acquired = []
+        try:
+            for lock in locks:
+                await self._acquire(lock)
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
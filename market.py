@@ -0,0 +1,168 @@
+import asyncio
+import json
+import math
+from types import MappingProxyType
+
+import numpy as np
+
+TICKERS = ('TECH', 'FOOD', 'AUTO', 'GAME', 'BANK')
+
+# name, starting price, yearly drift, yearly volatility
+_STOCKS = {
+    'TECH': ("Tech Corp", 150.0, 0.12, 0.45),
+    'FOOD': ("Food Inc", 60.0, 0.05, 0.15),
+    'AUTO': ("Auto Motors", 90.0, 0.07, 0.30),
+    'GAME': ("Game Studios", 45.0, 0.10, 0.60),
+    'BANK': ("Big Bank", 120.0, 0.06, 0.25),
+}
+
+# Sector correlation: tech and games move together, autos and banks
+# follow the credit cycle, food is defensive
+_CORRELATION = (
+    #  TECH  FOOD  AUTO  GAME  BANK
+    (1.00, 0.10, 0.30, 0.65, 0.35),
+    (0.10, 1.00, 0.15, 0.05, 0.20),
+    (0.30, 0.15, 1.00, 0.20, 0.50),
+    (0.65, 0.05, 0.20, 1.00, 0.25),
+    (0.35, 0.20, 0.50, 0.25, 1.00),
+)
+
+STOCK_NAMES = MappingProxyType({ticker: info[0] for ticker, info in _STOCKS.items()})
+
+# One simulated year passes every this many ticks
+TICKS_PER_YEAR = 24 * 365
+
+
+class Quotes:
+    """Immutable price snapshot; the simulator swaps in a new one each tick"""
+
+    __slots__ = ('tick', 'prices', 'previous')
+
+    def __init__(self, tick, prices, previous):
+        self.tick = tick
+        self.prices = MappingProxyType(dict(zip(TICKERS, prices)))
+        self.previous = MappingProxyType(dict(zip(TICKERS, previous)))
+
+    def change(self, ticker):
+        """Fractional change since the previous tick"""
+        return self.prices[ticker] / self.previous[ticker] - 1
+
+
+class MarketSimulator:
+    """Correlated geometric Brownian motion over every ticker at once.
+
+    Each tick draws one correlated normal vector and advances all prices
+    in a single vectorized step. Commands only ever read the current
+    Quotes snapshot, so they never wait on the simulation.
+
+    When several processes share storage, only one should simulate; the
+    others are followers that pick up its saved prices every tick.
+    """
+
+    def __init__(self, tick_seconds=60.0, history_size=1440, seed=None, storage=None,
+                 state_key='market_prices', follower=False):
+        self.tick_seconds = tick_seconds
+        self.storage = storage
+        self.follower = follower
+        self.state_key = state_key
+        self._rng = np.random.default_rng(seed)
+
+        initial = np.array([_STOCKS[ticker][1] for ticker in TICKERS])
+        drift = np.array([_STOCKS[ticker][2] for ticker in TICKERS])
+        volatility = np.array([_STOCKS[ticker][3] for ticker in TICKERS])
+        dt = 1 / TICKS_PER_YEAR
+        self._log_drift = (drift - 0.5 * volatility ** 2) * dt
+        # Cholesky factor turns independent normals into sector-correlated shocks
+        self._shock = np.linalg.cholesky(np.array(_CORRELATION)) * (volatility * math.sqrt(dt))[:, None]
+
+        # Ring buffer of past prices, one row per tick
+        self._history = np.empty((history_size, len(TICKERS)))
+        self._head = 0
+        self._filled = 0
+
+        self._prices = initial
+        self._record(initial)
+        self.quotes = Quotes(0, initial.tolist(), initial.tolist())
+        self._task = None
+
+    def _record(self, prices):
+        self._history[self._head] = prices
+        self._head = (self._head + 1) % len(self._history)
+        self._filled = min(self._filled + 1, len(self._history))
+
+    def tick(self, steps=1):
+        """Advance every ticker by steps ticks in one vectorized update"""
+        shocks = self._rng.standard_normal((steps, len(TICKERS))) @ self._shock.T
+        paths = self._prices * np.exp(np.cumsum(self._log_drift + shocks, axis=0))
+        for row in paths:
+            self._record(row)
+        previous = self._prices
+        self._prices = paths[-1]
+        self.quotes = Quotes(self.quotes.tick + steps, self._prices.tolist(), previous.tolist())
+        return self.quotes
+
+    def history(self, ticker, count=None):
+        """Past prices of ticker, oldest first"""
+        column = TICKERS.index(ticker)
+        count = self._filled if count is None else min(count, self._filled)
+        indexes = (self._head - count + np.arange(count)) % len(self._history)
+        return self._history[indexes, column].tolist()
+
+    def value_portfolios(self, holdings):
+        """Value {user_id: {ticker: shares}} for many users in one matrix product"""
+        user_ids = list(holdings)
+        if not user_ids:
+            return {}
+        shares = np.zeros((len(user_ids), len(TICKERS)))
+        columns = {ticker: i for i, ticker in enumerate(TICKERS)}
+        for row, user_id in enumerate(user_ids):
+            for ticker, count in holdings[user_id].items():
+                if ticker in columns:
+                    shares[row, columns[ticker]] = count
+        prices = np.array([self.quotes.prices[ticker] for ticker in TICKERS])
+        values = shares @ prices
+        return dict(zip(user_ids, values.astype(np.int64).tolist()))
+
+    async def load(self):
+        """Resume from the last saved prices, if any"""
+        if self.storage is None:
+            return
+        data = await self.storage.get(self.state_key)
+        if data:
+            saved = json.loads(data)
+            prices = np.array([float(saved.get(ticker, self._prices[i])) for i, ticker in enumerate(TICKERS)])
+            if np.array_equal(prices, self._prices):
+                return
+            previous = self._prices
+            self._prices = prices
+            self._record(prices)
+            self.quotes = Quotes(self.quotes.tick + 1, prices.tolist(), previous.tolist())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            if self.follower:
+                try:
+                    await self.load()
+                except Exception as e:
+                    print(f"Error loading market prices: {e}")
+                continue
+            quotes = self.tick()
+            if self.storage is not None:
+                try:
+                    await self.storage.put(self.state_key, json.dumps(dict(quotes.prices)))
+                except Exception as e:
+                    print(f"Error saving market prices: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
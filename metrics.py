@@ -0,0 +1,227 @@
+import asyncio
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from storage import Storage
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    inner = ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return '{' + inner + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Counter incremented directly, or read from func() at scrape time for totals kept elsewhere"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=(), func=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.func = func
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        if self.func is not None:
+            return self.func()
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        if self.func is not None:
+            yield self.name, '', self.func()
+            return
+        for label_values, value in list(self._values.items()):
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Gauge:
+    """Gauge set directly, or read from func() at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, func=None):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    def value(self):
+        return self.func() if self.func is not None else self._value
+
+    def samples(self):
+        yield self.name, '', self.value()
+
+
+class Histogram:
+    kind = 'histogram'
+
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        for label_values, series in list(self._series.items()):
+            series = list(series)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = (('le', _format_value(bound)),)
+                yield f'{self.name}_bucket', _format_labels(self.labels, label_values, le), cumulative
+            yield f'{self.name}_sum', _format_labels(self.labels, label_values), series[-1]
+            yield f'{self.name}_count', _format_labels(self.labels, label_values), cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=(), func=None):
+        return self._register(Counter(name, documentation, labels, func))
+
+    def gauge(self, name, documentation, func=None):
+        return self._register(Gauge(name, documentation, func))
+
+    def histogram(self, name, documentation, labels=(), buckets=Histogram.DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry served by the /metrics endpoint
+registry = Registry()
+
+storage_ops = registry.histogram(
+    'storage_operation_seconds', 'Time spent in storage backend calls', labels=('operation',)
+)
+
+
+def timed(histogram, *label_values):
+    """Decorator recording how long a sync or async function takes"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with histogram.time(*label_values):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with histogram.time(*label_values):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class InstrumentedStorage(Storage):
+    """Storage wrapper that records call counts and timings in storage_ops"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def get(self, key):
+        with storage_ops.time('get'):
+            return await self.inner.get(key)
+
+    async def put(self, key, value):
+        with storage_ops.time('put'):
+            await self.inner.put(key, value)
+
+    async def put_many(self, items):
+        with storage_ops.time('put_many'):
+            await self.inner.put_many(items)
+
+    async def get_versioned(self, key):
+        with storage_ops.time('get'):
+            return await self.inner.get_versioned(key)
+
+    async def compare_and_put_many(self, items, expected):
+        with storage_ops.time('put_many'):
+            return await self.inner.compare_and_put_many(items, expected)
+
+    async def scan(self, prefix):
+        # Records how long the scan stayed open, including the caller's work
+        start = time.perf_counter()
+        try:
+            async for item in self.inner.scan(prefix):
+                yield item
+        finally:
+            storage_ops.observe(time.perf_counter() - start, 'scan')
+
+    async def changes_since(self, seq):
+        with storage_ops.time('changes_since'):
+            return await self.inner.changes_since(seq)
+
+    async def close(self):
+        await self.inner.close()
+
+
+async def monitor_loop_lag(gauge, interval=1.0):
+    """Keep gauge set to how late the event loop wakes a sleeping task"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        gauge.set(max(0.0, loop.time() - start - interval))
@@ -0,0 +1,306 @@
+import json
+import struct
+import time
+from datetime import datetime
+
+# Wire format version written by encode_profile. Bump it and add a decoder
+# to _DECODERS whenever the layout changes; older versions keep decoding.
+PROFILE_VERSION = 2
+
+# version, money, level, experience, last_work, last_crime, last_daily,
+# created_at, premium_expires, premium
+_HEADER = struct.Struct('<BqiqqqqqqB')
+_LENGTH = struct.Struct('<H')
+_BLOB_LENGTH = struct.Struct('<I')
+_COUNT = struct.Struct('<q')
+
+# Timestamps are epoch seconds; -1 marks "never" on the wire
+_NO_TIME = -1
+
+TIMESTAMP_FIELDS = ('last_work', 'last_crime', 'last_daily', 'created_at', 'premium_expires')
+
+
+class Profile:
+    """A player's saved state.
+
+    Timestamps are integer epoch seconds (or None), so cooldown checks are
+    plain integer comparisons.
+    """
+
+    FIELDS = (
+        'money', 'job', 'level', 'experience',
+        'last_work', 'last_crime', 'last_daily',
+        'inventory', 'achievements', 'created_at',
+        'premium', 'premium_expires', 'premium_features_used',
+        'stocks'
+    )
+    # Weak references let the cache track profiles it no longer holds
+    __slots__ = FIELDS + ('__weakref__',)
+
+    def __init__(self, money=0, job='Homeless', level=1, experience=0,
+                 last_work=None, last_crime=None, last_daily=None,
+                 inventory=None, achievements=None, created_at=None,
+                 premium=False, premium_expires=None, premium_features_used=None,
+                 stocks=None):
+        self.money = money
+        self.job = job
+        self.level = level
+        self.experience = experience
+        self.last_work = last_work
+        self.last_crime = last_crime
+        self.last_daily = last_daily
+        self.inventory = inventory if inventory is not None else {}
+        self.achievements = achievements if achievements is not None else []
+        self.created_at = created_at if created_at is not None else int(time.time())
+        self.premium = premium
+        self.premium_expires = premium_expires
+        self.premium_features_used = premium_features_used if premium_features_used is not None else {}
+        self.stocks = stocks if stocks is not None else {}  # ticker -> shares
+
+    def __eq__(self, other):
+        if not isinstance(other, Profile):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Profile(money={self.money}, job={self.job!r}, level={self.level})"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a profile from a dict, converting legacy values to the types the codec packs.
+
+        Accepts ISO-8601 timestamps, float amounts and inventories stored as
+        item lists or with item details instead of counts. Raises ValueError
+        for values that can't be converted.
+        """
+        fields = {name: data[name] for name in cls.FIELDS if name in data}
+        try:
+            for name in TIMESTAMP_FIELDS:
+                if name in fields:
+                    fields[name] = _to_epoch(fields[name])
+            for name in ('money', 'level', 'experience'):
+                if name in fields:
+                    fields[name] = _to_int(fields[name])
+            if 'job' in fields:
+                fields['job'] = str(fields['job'])
+            if 'premium' in fields:
+                fields['premium'] = bool(fields['premium'])
+            if 'inventory' in fields:
+                fields['inventory'] = _to_inventory(fields['inventory'])
+            if 'achievements' in fields:
+                fields['achievements'] = [str(name) for name in fields['achievements'] or ()]
+            if 'stocks' in fields:
+                fields['stocks'] = {str(ticker): _to_int(shares) for ticker, shares in (fields['stocks'] or {}).items()}
+            if not isinstance(fields.get('premium_features_used', {}), dict):
+                fields['premium_features_used'] = {}
+        except (TypeError, AttributeError, OverflowError) as e:
+            raise ValueError(f"Invalid profile data: {e}") from e
+        return cls(**fields)
+
+
+def _to_epoch(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        # Legacy profiles stored naive local time from datetime.now()
+        return int(datetime.fromisoformat(value).timestamp())
+    return int(value)
+
+
+def _to_int(value):
+    if isinstance(value, str):
+        return int(float(value))
+    return int(value)
+
+
+def _to_inventory(value):
+    """item -> count; legacy inventories were item lists or kept item details instead of a count"""
+    if not value:
+        return {}
+    if not isinstance(value, dict):
+        return {str(item): 1 for item in value}
+    inventory = {}
+    for item, count in value.items():
+        try:
+            inventory[str(item)] = max(_to_int(count), 1)
+        except (TypeError, ValueError):
+            inventory[str(item)] = 1
+    return inventory
+
+
+def _pick(base, local, remote):
+    # Three-way merge of a value: keep a local change, otherwise take theirs
+    return remote if local == base else local
+
+
+def _merge_counts(base, local, remote):
+    merged = {}
+    for key in {**remote, **local}:
+        count = local.get(key, 0) + remote.get(key, 0) - base.get(key, 0)
+        if count > 0:
+            merged[key] = count
+    return merged
+
+
+def _latest(local, remote):
+    if local is None or remote is None:
+        return local if remote is None else remote
+    return max(local, remote)
+
+
+def merge_profiles(base, local, remote):
+    """Fold another process's write (remote) into local, both changed from base.
+
+    Amounts (money, item and share counts) add up both sides' changes, so
+    concurrent gifts or earnings are never lost. Cooldown timestamps take
+    the later one, achievements are combined, and anything else both sides
+    changed keeps the local value. base is None for a profile created
+    locally. local is updated in place and returned.
+    """
+    if base is None:
+        base = Profile(created_at=local.created_at)
+    if remote is None:
+        return local
+
+    local.money = local.money + remote.money - base.money
+    if local.level == remote.level == base.level:
+        local.experience = local.experience + remote.experience - base.experience
+    elif (remote.level, remote.experience) > (local.level, local.experience):
+        local.level, local.experience = remote.level, remote.experience
+    local.inventory = _merge_counts(base.inventory, local.inventory, remote.inventory)
+    local.stocks = _merge_counts(base.stocks, local.stocks, remote.stocks)
+    local.achievements += [name for name in remote.achievements if name not in local.achievements]
+    for name in ('last_work', 'last_crime', 'last_daily'):
+        setattr(local, name, _latest(getattr(local, name), getattr(remote, name)))
+    local.created_at = min(local.created_at, remote.created_at)
+    for name in ('job', 'premium', 'premium_expires', 'premium_features_used'):
+        setattr(local, name, _pick(getattr(base, name), getattr(local, name), getattr(remote, name)))
+    return local
+
+
+def _pack_str(value):
+    data = value.encode('utf-8')
+    return _LENGTH.pack(len(data)) + data
+
+
+def encode_profile(profile):
+    """Serialize a profile to the compact binary wire format"""
+    def t(value):
+        return _NO_TIME if value is None else value
+
+    parts = [
+        _HEADER.pack(
+            PROFILE_VERSION, profile.money, profile.level, profile.experience,
+            t(profile.last_work), t(profile.last_crime), t(profile.last_daily),
+            t(profile.created_at), t(profile.premium_expires), profile.premium
+        ),
+        _pack_str(profile.job),
+        _LENGTH.pack(len(profile.inventory)),
+    ]
+    for item, count in profile.inventory.items():
+        parts.append(_pack_str(item))
+        parts.append(_COUNT.pack(count))
+    parts.append(_LENGTH.pack(len(profile.achievements)))
+    for achievement in profile.achievements:
+        parts.append(_pack_str(achievement))
+    # Free-form feature counters stay JSON; they are small and rarely set
+    features = json.dumps(profile.premium_features_used).encode('utf-8') if profile.premium_features_used else b''
+    parts.append(_BLOB_LENGTH.pack(len(features)))
+    parts.append(features)
+    # Version 2: stock holdings
+    parts.append(_LENGTH.pack(len(profile.stocks)))
+    for ticker, shares in profile.stocks.items():
+        parts.append(_pack_str(ticker))
+        parts.append(_COUNT.pack(shares))
+    return b''.join(parts)
+
+
+class _Reader:
+    def __init__(self, data, offset):
+        self.data = data
+        self.offset = offset
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def bytes(self, length):
+        end = self.offset + length
+        if end > len(self.data):
+            raise ValueError("Truncated profile data")
+        value = self.data[self.offset:end]
+        self.offset = end
+        return value
+
+    def str(self):
+        (length,) = self.unpack(_LENGTH)
+        return self.bytes(length).decode('utf-8')
+
+
+def _decode_v1(data, reader=None):
+    reader = reader or _Reader(data, 0)
+    (_, money, level, experience, last_work, last_crime, last_daily,
+     created_at, premium_expires, premium) = reader.unpack(_HEADER)
+
+    def t(value):
+        return None if value == _NO_TIME else value
+
+    job = reader.str()
+    inventory = {}
+    (count,) = reader.unpack(_LENGTH)
+    for _ in range(count):
+        item = reader.str()
+        (inventory[item],) = reader.unpack(_COUNT)
+    (count,) = reader.unpack(_LENGTH)
+    achievements = [reader.str() for _ in range(count)]
+    (length,) = reader.unpack(_BLOB_LENGTH)
+    features = reader.bytes(length)
+
+    return Profile(
+        money=money, job=job, level=level, experience=experience,
+        last_work=t(last_work), last_crime=t(last_crime), last_daily=t(last_daily),
+        inventory=inventory, achievements=achievements, created_at=t(created_at),
+        premium=bool(premium), premium_expires=t(premium_expires),
+        premium_features_used=json.loads(features) if features else {}
+    )
+
+
+def _decode_v2(data):
+    # Version 1 layout followed by stock holdings
+    reader = _Reader(data, 0)
+    profile = _decode_v1(data, reader)
+    (count,) = reader.unpack(_LENGTH)
+    for _ in range(count):
+        ticker = reader.str()
+        (profile.stocks[ticker],) = reader.unpack(_COUNT)
+    return profile
+
+
+_DECODERS = {
+    1: _decode_v1,
+    2: _decode_v2,
+}
+
+
+def decode_profile(data):
+    """Deserialize a stored profile, migrating older layouts on the fly.
+
+    Version 0 is the original JSON text written by the Replit store.
+    Raises ValueError for data that can't be decoded.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if data[:1] == b'{':
+        return Profile.from_dict(json.loads(data))
+
+    decoder = _DECODERS.get(data[0]) if data else None
+    if decoder is None:
+        raise ValueError(f"Unknown profile format version: {data[:1]!r}")
+    try:
+        return decoder(data)
+    except struct.error as e:
+        raise ValueError(f"Corrupt profile data: {e}") from e
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+
+# Spawn keys keep the shard and per-user streams of one seed independent
+_SHARD_STREAM = 0
+_USER_STREAM = 1
+
+
+class Stream:
+    """Uniform draws served from a precomputed NumPy block.
+
+    Drawing a block of floats at once and handing them out from a plain
+    list costs far less per draw than calling into a generator each time.
+    """
+
+    __slots__ = ('_generator', '_block', '_index', 'block_size')
+
+    def __init__(self, seed_sequence, block_size):
+        import numpy as np
+        self._generator = np.random.Generator(np.random.PCG64(seed_sequence))
+        self.block_size = block_size
+        self._block = []
+        self._index = 0
+
+    def random(self):
+        """Float in [0, 1)"""
+        index = self._index
+        if index == len(self._block):
+            self._block = self._generator.random(self.block_size).tolist()
+            index = 0
+        self._index = index + 1
+        return self._block[index]
+
+    def randint(self, a, b):
+        """Integer in [a, b], like random.randint"""
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+
+class RNGService:
+    """Gameplay randomness with one stream per shard and one per user.
+
+    Per-user streams make a player's outcomes depend only on their own
+    commands, not on how they interleave with everyone else's, so a seeded
+    run reproduces exactly however the event loop schedules it. User
+    streams are kept in a bounded LRU; with a seed an evicted stream
+    restarts from the beginning, without one every stream uses fresh
+    entropy.
+
+    NumPy is only imported when the first stream is created, keeping it
+    off the import path of the bot.
+    """
+
+    def __init__(self, seed=None, shard_id=0, block_size=1024, user_block_size=64, max_users=10000):
+        self.seed = seed
+        self.shard_id = shard_id
+        self.block_size = block_size
+        self.user_block_size = user_block_size
+        self.max_users = max_users
+        self._shard = None
+        self._users = OrderedDict()
+
+    @property
+    def shard(self):
+        """The stream for outcomes not tied to one player"""
+        if self._shard is None:
+            self._shard = Stream(self._sequence(_SHARD_STREAM, self.shard_id), self.block_size)
+        return self._shard
+
+    def _sequence(self, *spawn_key):
+        import numpy as np
+        if self.seed is None:
+            return np.random.SeedSequence()
+        return np.random.SeedSequence(self.seed, spawn_key=spawn_key)
+
+    def user(self, user_id):
+        """The stream for one player's outcomes"""
+        user_id = int(user_id)
+        stream = self._users.get(user_id)
+        if stream is not None:
+            self._users.move_to_end(user_id)
+            return stream
+        stream = self._users[user_id] = Stream(self._sequence(_USER_STREAM, user_id), self.user_block_size)
+        if len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return stream
@@ -0,0 +1,209 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+
+
+class Deadline:
+    __slots__ = ('kind', 'item_id', 'due', 'data')
+
+    def __init__(self, kind, item_id, due, data=None):
+        self.kind = kind
+        self.item_id = item_id
+        self.due = due
+        self.data = data if data is not None else {}
+
+    def __repr__(self):
+        return f"Deadline({self.kind!r}, {self.item_id!r}, due={self.due})"
+
+
+class DeadlineScheduler:
+    """Persistent min-heap of (kind, item_id) deadlines such as loan due dates.
+
+    Each deadline is stored under key_prefix + kind + '_' + item_id (kinds
+    are single words) with its due time and data, so load() rebuilds the
+    heap with one scan after a restart. The run loop sleeps until the
+    earliest deadline, then hands everything due to handlers[kind] in one
+    list per kind and clears them all in one storage batch.
+
+    A deadline may be cancelled while its batch is waiting, so handlers
+    should confirm each one with is_live() under the same lock that
+    guards cancel(), and call complete() under that lock once it's done.
+    If a handler raises, only the deadlines it didn't complete are
+    retried after retry_delay. Removal writes an empty value rather than deleting
+    the key, which lets other processes see it through changes_since().
+
+    When several processes share storage, only one should run deadlines;
+    followers just add and remove them, and the runner picks their
+    changes up every sync_interval seconds.
+    """
+
+    def __init__(self, storage, handlers, key_prefix='deadline_', follower=False,
+                 sync_interval=None, retry_delay=60.0, clock=time.time):
+        self.storage = storage
+        self.handlers = handlers
+        self.key_prefix = key_prefix
+        self.follower = follower
+        self.sync_interval = sync_interval
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self._deadlines = {}  # (kind, item_id) -> Deadline
+        self._heap = []  # (fire time, tiebreak, Deadline), may hold stale entries
+        self._counter = itertools.count()
+        self._completed = set()  # deadlines of the running batch their handler finished
+        self._wakeup = asyncio.Event()
+        self._seq = None
+        self._task = None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def _key(self, kind, item_id):
+        return f"{self.key_prefix}{kind}_{item_id}"
+
+    def _parse(self, key, value):
+        kind, _, item_id = key[len(self.key_prefix):].partition('_')
+        record = json.loads(value)
+        return Deadline(kind, item_id, record['due'], record.get('data'))
+
+    def _add(self, deadline, when=None):
+        self._deadlines[(deadline.kind, deadline.item_id)] = deadline
+        entry = (deadline.due if when is None else when, next(self._counter), deadline)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            # New earliest deadline: the run loop is sleeping too long
+            self._wakeup.set()
+
+    async def fetch(self, kind, item_id):
+        """Read a deadline straight from storage (it may belong to another process)"""
+        value = await self.storage.get(self._key(kind, item_id))
+        return self._parse(self._key(kind, item_id), value) if value else None
+
+    async def is_live(self, deadline):
+        """Whether deadline is still stored unchanged (not cancelled or moved)"""
+        current = await self.fetch(deadline.kind, deadline.item_id)
+        return current is not None and current.due == deadline.due
+
+    async def schedule(self, kind, item_id, due, data=None):
+        """Persist a deadline, replacing any earlier one for the same item"""
+        deadline = Deadline(kind, str(item_id), due, data)
+        await self.storage.put(self._key(kind, item_id), json.dumps({'due': due, 'data': deadline.data}))
+        self._add(deadline)
+        return deadline
+
+    async def cancel(self, kind, item_id):
+        """Remove a deadline; its stale heap entry is skipped when popped"""
+        item_id = str(item_id)
+        await self.storage.put(self._key(kind, item_id), '')
+        self._deadlines.pop((kind, item_id), None)
+
+    async def complete(self, deadline):
+        """Clear a deadline its handler has acted on, so a retried batch skips it"""
+        self._completed.add(deadline)
+        await self.storage.put(self._key(deadline.kind, deadline.item_id), '')
+
+    async def load(self):
+        """Rebuild the heap from storage in a single scan"""
+        self._deadlines.clear()
+        async for key, value in self.storage.scan(self.key_prefix):
+            if value:
+                deadline = self._parse(key, value)
+                self._deadlines[(deadline.kind, deadline.item_id)] = deadline
+        self._heap = [(d.due, next(self._counter), d) for d in self._deadlines.values()]
+        heapq.heapify(self._heap)
+        if self.sync_interval:
+            self._seq, _ = await self.storage.changes_since(None)
+        return len(self._deadlines)
+
+    async def sync(self):
+        """Pick up deadlines other processes added or removed"""
+        self._seq, keys = await self.storage.changes_since(self._seq)
+        for key in keys:
+            if not key.startswith(self.key_prefix):
+                continue
+            kind, _, item_id = key[len(self.key_prefix):].partition('_')
+            value = await self.storage.get(key)
+            if value:
+                self._add(self._parse(key, value))
+            else:
+                self._deadlines.pop((kind, item_id), None)
+
+    def _pop_due(self, now):
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline = heapq.heappop(heap)[2]
+            key = (deadline.kind, deadline.item_id)
+            # Skip heap entries superseded by a later schedule() or cancel()
+            if self._deadlines.get(key) is deadline:
+                del self._deadlines[key]
+                due.append(deadline)
+        return due
+
+    async def run_due(self):
+        """Fire every deadline that has passed; returns how many fired"""
+        by_kind = {}
+        for deadline in self._pop_due(self.clock()):
+            by_kind.setdefault(deadline.kind, []).append(deadline)
+
+        fired = 0
+        for kind, batch in by_kind.items():
+            handler = self.handlers.get(kind)
+            if handler is None:
+                print(f"No handler for {kind} deadlines")
+                continue
+            self._completed.clear()
+            try:
+                await handler(batch)
+            except Exception as e:
+                print(f"Error running {kind} deadlines: {e}")
+                for deadline in batch:
+                    if deadline in self._completed:
+                        fired += 1
+                    else:
+                        self._add(deadline, when=self.clock() + self.retry_delay)
+                continue
+            await self.storage.put_many([
+                (self._key(d.kind, d.item_id), '') for d in batch
+                if d not in self._completed and (d.kind, d.item_id) not in self._deadlines
+            ])
+            fired += len(batch)
+        return fired
+
+    def _sleep_time(self, now):
+        timeouts = []
+        if self._heap:
+            timeouts.append(max(0.0, self._heap[0][0] - now))
+        if self.sync_interval:
+            timeouts.append(self.sync_interval)
+        return min(timeouts) if timeouts else None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            timeout = self._sleep_time(self.clock())
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                if self.sync_interval:
+                    await self.sync()
+                await self.run_due()
+            except Exception as e:
+                print(f"Error processing deadlines: {e}")
+
+    def start(self):
+        if self._task is None and not self.follower:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,45 @@
+import json
+import time
+
+
+class StartupTimer:
+    """Records how long each boot phase took, measured from process start.
+
+    report() prints a table; with a log path it also appends one JSON line
+    per boot so startup time can be compared across releases.
+    """
+
+    def __init__(self, started=None, clock=time.perf_counter):
+        self.clock = clock
+        self.started = started if started is not None else clock()
+        self._last = self.started
+        self.phases = []  # (name, seconds the phase took, seconds since start)
+
+    def mark(self, name):
+        """End the current phase, naming it"""
+        now = self.clock()
+        self.phases.append((name, now - self._last, now - self.started))
+        self._last = now
+
+    @property
+    def elapsed(self):
+        return self.clock() - self.started
+
+    def report(self, log_path=None, **details):
+        lines = [f"{'startup phase':<30}{'took':>10}{'at':>10}"]
+        for name, took, at in self.phases:
+            lines.append(f"{name:<30}{took:>9.3f}s{at:>9.3f}s")
+        print('\n'.join(lines))
+
+        if log_path:
+            record = {
+                'time': int(time.time()),
+                'total': round(self.elapsed, 4),
+                'phases': {name: round(took, 4) for name, took, _ in self.phases},
+                **details
+            }
+            try:
+                with open(log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError as e:
+                print(f"Error writing startup log: {e}")
@@ -0,0 +1,259 @@
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Storage:
+    """Async key-value store used for all profile data.
+
+    Values are stored verbatim (str or bytes), so callers own the encoding.
+    """
+
+    async def get(self, key):
+        raise NotImplementedError
+
+    async def put(self, key, value):
+        raise NotImplementedError
+
+    async def put_many(self, items):
+        """Write a batch of (key, value) pairs atomically"""
+        raise NotImplementedError
+
+    async def get_versioned(self, key):
+        """Return (value, version); the version changes on every write and is 0 for missing keys"""
+        return await self.get(key), 0
+
+    async def compare_and_put_many(self, items, expected):
+        """Write a batch atomically if every key in expected still has that version.
+
+        Returns (version, conflicts). On success version is what the written
+        keys now have and conflicts is empty; otherwise nothing is written
+        and conflicts maps each changed key to its current (value, version).
+        Stores that only ever have one writer never conflict.
+        """
+        await self.put_many(items)
+        return 0, {}
+
+    async def scan(self, prefix):
+        """Yield (key, value) pairs whose key starts with prefix, in key order"""
+        raise NotImplementedError
+        yield
+
+    async def changes_since(self, seq):
+        """Return (current_seq, keys written by other processes after seq).
+
+        Pass seq=None to just learn the current sequence number. Stores that
+        only ever have one writer report no changes.
+        """
+        return 0, []
+
+    async def close(self):
+        pass
+
+
+class MemoryStorage(Storage):
+    """Dict-backed storage for tests and benchmarks"""
+
+    def __init__(self):
+        self.data = {}
+        self.versions = {}
+        self.seq = 0
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def put(self, key, value):
+        await self.put_many([(key, value)])
+
+    async def put_many(self, items):
+        self.seq += 1
+        for key, value in items:
+            self.data[key] = value
+            self.versions[key] = self.seq
+
+    async def get_versioned(self, key):
+        return self.data.get(key), self.versions.get(key, 0)
+
+    async def compare_and_put_many(self, items, expected):
+        conflicts = {
+            key: (self.data.get(key), self.versions.get(key, 0))
+            for key, version in expected.items() if self.versions.get(key, 0) != version
+        }
+        if conflicts:
+            return None, conflicts
+        await self.put_many(items)
+        return self.seq, {}
+
+    async def scan(self, prefix):
+        for key in sorted(k for k in self.data if k.startswith(prefix)):
+            value = self.data.get(key)
+            if value is not None:
+                yield key, value
+
+
+class SQLiteStorage(Storage):
+    """Local SQLite storage in WAL mode.
+
+    sqlite3 calls block, so they all run on one dedicated worker thread
+    (the same approach aiosqlite takes) and never on the event loop.
+
+    Several processes can share one database file: every write batch is
+    stamped with a global sequence number and the writer's id, which lets
+    each process find out what the others changed via changes_since().
+    A row's sequence number doubles as its version for compare_and_put_many().
+    """
+
+    SCAN_PAGE_SIZE = 500
+    BUSY_TIMEOUT_MS = 5000
+
+    def __init__(self, path, writer_id=None):
+        self.path = path
+        self.writer_id = writer_id or str(os.getpid())
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        self._conn = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv "
+                "(key TEXT PRIMARY KEY, value, seq INTEGER NOT NULL DEFAULT 0, writer TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(kv)")}
+            if 'seq' not in columns:
+                # Databases created before multi-process support
+                try:
+                    conn.execute("ALTER TABLE kv ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+                    conn.execute("ALTER TABLE kv ADD COLUMN writer TEXT")
+                except sqlite3.OperationalError:
+                    pass  # Another process migrated it first
+            conn.execute("CREATE INDEX IF NOT EXISTS kv_seq ON kv (seq)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('seq', 0)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _next_seq(self, conn):
+        # The UPDATE takes the write lock, so batches get strictly increasing numbers
+        conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'seq'")
+        return conn.execute("SELECT value FROM meta WHERE name = 'seq'").fetchone()[0]
+
+    def _get(self, key):
+        row = self._connect().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _get_versioned(self, key):
+        row = self._connect().execute("SELECT value, seq FROM kv WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+
+    def _put(self, key, value):
+        self._put_many([(key, value)])
+
+    def _put_many(self, items):
+        conn = self._connect()
+        with conn:
+            seq = self._next_seq(conn)
+            conn.executemany(
+                "INSERT OR REPLACE INTO kv (key, value, seq, writer) VALUES (?, ?, ?, ?)",
+                [(key, value, seq, self.writer_id) for key, value in items]
+            )
+
+    def _compare_and_put_many(self, items, expected):
+        conn = self._connect()
+        with conn:
+            # Taking the next seq first holds the write lock, so versions can't change under the check
+            seq = self._next_seq(conn)
+            conflicts = {}
+            for key, version in expected.items():
+                row = conn.execute("SELECT value, seq FROM kv WHERE key = ?", (key,)).fetchone()
+                current = (row[0], row[1]) if row else (None, 0)
+                if current[1] != version:
+                    conflicts[key] = current
+            if conflicts:
+                conn.rollback()
+                return None, conflicts
+            conn.executemany(
+                "INSERT OR REPLACE INTO kv (key, value, seq, writer) VALUES (?, ?, ?, ?)",
+                [(key, value, seq, self.writer_id) for key, value in items]
+            )
+        return seq, {}
+
+    def _changes_since(self, seq):
+        conn = self._connect()
+        current = conn.execute("SELECT value FROM meta WHERE name = 'seq'").fetchone()[0]
+        if seq is None or seq >= current:
+            return current, []
+        rows = conn.execute(
+            "SELECT key FROM kv WHERE seq > ? AND seq <= ? AND writer IS NOT ?",
+            (seq, current, self.writer_id)
+        ).fetchall()
+        return current, [row[0] for row in rows]
+
+    def _scan_page(self, prefix, after):
+        # Range query on the primary key; prefix + U+10FFFF bounds the prefix
+        if after is None:
+            query = "SELECT key, value FROM kv WHERE key >= ? AND key < ? ORDER BY key LIMIT ?"
+            start = prefix
+        else:
+            query = "SELECT key, value FROM kv WHERE key > ? AND key < ? ORDER BY key LIMIT ?"
+            start = after
+        return self._connect().execute(
+            query, (start, prefix + '\U0010ffff', self.SCAN_PAGE_SIZE)
+        ).fetchall()
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def get(self, key):
+        return await self._run(self._get, key)
+
+    async def put(self, key, value):
+        await self._run(self._put, key, value)
+
+    async def put_many(self, items):
+        await self._run(self._put_many, list(items))
+
+    async def get_versioned(self, key):
+        return await self._run(self._get_versioned, key)
+
+    async def compare_and_put_many(self, items, expected):
+        return await self._run(self._compare_and_put_many, list(items), dict(expected))
+
+    async def changes_since(self, seq):
+        return await self._run(self._changes_since, seq)
+
+    async def scan(self, prefix):
+        # Page through the table so huge prefixes never load all at once
+        after = None
+        while True:
+            rows = await self._run(self._scan_page, prefix, after)
+            for key, value in rows:
+                if key.startswith(prefix):
+                    yield key, value
+            if len(rows) < self.SCAN_PAGE_SIZE:
+                return
+            after = rows[-1][0]
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+
+def create_storage(backend=None, path=None):
+    """Build the storage backend named by STORAGE_BACKEND (sqlite or memory)"""
+    if backend == 'memory':
+        return MemoryStorage()
+    if backend in (None, '', 'sqlite'):
+        return SQLiteStorage(path or 'bot.db')
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,99 @@
+from collections import defaultdict
+
+
+def _trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b, limit):
+    """Levenshtein distance where swapping two adjacent letters is one edit
+    (optimal string alignment), giving up early once it exceeds limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            )
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class SuggestionIndex:
+    """Ranks registered commands by how closely they match a mistyped name.
+
+    Candidates come from a trigram inverted index over every command name
+    and alias, then get ranked by edit distance and trigram overlap.
+    Keyword hints (e.g. "steal" -> rob, crime) are kept for words that
+    don't look like any command, filtered to commands that really exist.
+    """
+
+    def __init__(self, hints=None):
+        self.hints = hints or {}
+        self._names = frozenset()
+        self._canonical = {}  # name or alias -> command name
+        self._grams = {}  # name or alias -> trigram set
+        self._postings = defaultdict(set)  # trigram -> names containing it
+        self._hints = {}  # keyword -> registered commands
+
+    def sync(self, all_commands):
+        """Rebuild from bot.all_commands if commands were added or removed since the last build"""
+        if all_commands.keys() == self._names:
+            return
+        self._names = frozenset(all_commands)
+        self._canonical = {
+            name: command.name for name, command in all_commands.items()
+            if not command.hidden
+        }
+        self._grams = {name: _trigrams(name) for name in self._canonical}
+        self._postings = defaultdict(set)
+        for name, grams in self._grams.items():
+            for gram in grams:
+                self._postings[gram].add(name)
+        registered = set(self._canonical.values())
+        self._hints = {
+            keyword: tuple(command for command in commands if command in registered)
+            for keyword, commands in self.hints.items()
+        }
+
+    def suggest(self, text, limit=5):
+        text = text.lower()
+        if not text:
+            return []
+
+        query = _trigrams(text)
+        overlap = defaultdict(int)
+        for gram in query:
+            for name in self._postings.get(gram, ()):
+                overlap[name] += 1
+
+        max_distance = max(1, len(text) // 3)
+        ranked = []
+        for name, shared in overlap.items():
+            similarity = 2 * shared / (len(query) + len(self._grams[name]))
+            distance = _edit_distance(text, name, max_distance)
+            if distance <= max_distance or similarity >= 0.4 or name.startswith(text):
+                ranked.append((distance, -similarity, name))
+        ranked.sort()
+
+        suggestions = []
+        for _, _, name in ranked:
+            suggestions.append(self._canonical[name])
+        for keyword, commands in self._hints.items():
+            if keyword in text or text in keyword:
+                suggestions.extend(commands)
+
+        # Drop duplicates (aliases of the same command) keeping the best rank
+        return list(dict.fromkeys(suggestions))[:limit]
@@ -0,0 +1,298 @@
+import discord
+from types import MappingProxyType
+
+# Static content is built once at import time and never mutated. Embeds
+# that carry per-user values are stored as plain template dicts and
+# cloned with build_embed(), which is cheaper than Embed.copy().
+
+
+def field(name, value, inline=True):
+    return {'name': name, 'value': value, 'inline': inline}
+
+
+def build_embed(template, fields=(), **overrides):
+    """Clone an embed template, putting per-user fields ahead of its static ones"""
+    data = {**template, **overrides}
+    data['fields'] = [*fields, *template.get('fields', ())]
+    return discord.Embed.from_dict(data)
+
+
+def _freeze(table):
+    return MappingProxyType({key: MappingProxyType(value) for key, value in table.items()})
+
+
+_COMMAND_HELP = {
+    'deal': {
+        'usage': '!deal @user <amount> <days>',
+        'description': 'Give a loan to another player',
+        'example': '!deal @JohnDoe 5000 7',
+        'explanation': '• @user: The person to give the loan to\n• amount: Money amount (max $50,000)\n• days: Loan duration (max 30 days)\n• The borrower repays the amount plus 10% with !repay\n\n⚠️ If loan isn\'t repaid, borrower loses everything!'
+    },
+    'gift': {
+        'usage': '!gift @user <amount>',
+        'description': 'Gift money to another player',
+        'example': '!gift @JohnDoe 1000',
+        'explanation': '• @user: The person to gift money to\n• amount: How much money to give'
+    },
+    'buy': {
+        'usage': '!buy <item_name>',
+        'description': 'Buy an item from the shop',
+        'example': '!buy phone',
+        'explanation': '• item_name: phone, laptop, car, house, or watch\nUse !shop to see all available items'
+    },
+    'rob': {
+        'usage': '!rob @user',
+        'description': 'Attempt to rob another player',
+        'example': '!rob @JohnDoe',
+        'explanation': '• @user: The player to attempt robbing\n• Target must have at least $100\n• 1 hour cooldown between attempts'
+    },
+    'gamble': {
+        'usage': '!gamble <amount>',
+        'description': 'Risk money for potential rewards',
+        'example': '!gamble 500',
+        'explanation': '• amount: How much money to risk\n• Higher risk = higher potential reward'
+    },
+    'invest': {
+        'usage': '!invest <stock> <shares>',
+        'description': 'Buy stocks for potential profit',
+        'example': '!invest TECH 10',
+        'explanation': '• stock: TECH, FOOD, AUTO, GAME, or BANK\n• shares: Number of shares to buy\nUse !stocks to see current prices'
+    },
+    'sell': {
+        'usage': '!sell <stock> <shares>',
+        'description': 'Sell stocks you own',
+        'example': '!sell TECH 10',
+        'explanation': '• stock: TECH, FOOD, AUTO, GAME, or BANK\n• shares: Number of shares to sell\nUse !stocks to see your portfolio'
+    },
+    'addmoney': {
+        'usage': '!addmoney @user <amount>',
+        'description': '[OWNER ONLY] Add unlimited money',
+        'example': '!addmoney @JohnDoe 1000000',
+        'explanation': '• @user: Player to give money to (optional)\n• amount: Amount to add (optional, default 1M)'
+    },
+    'setmoney': {
+        'usage': '!setmoney @user <amount>',
+        'description': '[OWNER ONLY] Set exact money amount',
+        'example': '!setmoney @JohnDoe 50000',
+        'explanation': '• @user: Player to set money for\n• amount: Exact amount to set'
+    },
+    'buypremium': {
+        'usage': '!buypremium <plan>',
+        'description': 'Purchase premium access',
+        'example': '!buypremium month',
+        'explanation': '• plan: week ($10K), month ($35K), or lifetime ($100K)\nUse !premium to see all benefits'
+    },
+    'vault': {
+        'usage': '!vault <action> <amount>',
+        'description': '[PREMIUM] Secure money storage',
+        'example': '!vault deposit 5000',
+        'explanation': '• action: deposit or withdraw\n• amount: How much money to move\nVault protects money from robberies!'
+    },
+    'premiumgift': {
+        'usage': '!premiumgift @user <amount> <message>',
+        'description': '[PREMIUM] Send stylish gifts',
+        'example': '!premiumgift @JohnDoe 1000 Happy birthday!',
+        'explanation': '• @user: Person to gift to\n• amount: Money amount\n• message: Personal message (optional)'
+    },
+    'premiumcasino': {
+        'usage': '!premiumcasino <amount>',
+        'description': '[PREMIUM] High-stakes gambling',
+        'example': '!premiumcasino 5000',
+        'explanation': '• amount: Money to bet (minimum $1,000)\nBetter odds than regular gambling!'
+    }
+}
+
+COMMAND_HELP = _freeze(_COMMAND_HELP)
+
+
+def _help_embed(cmd_info):
+    embed = discord.Embed(
+        title=f"❓ Command Help: {cmd_info['usage']}",
+        description=cmd_info['description'],
+        color=0x3498db
+    )
+    embed.add_field(name="📖 Usage", value=f"`{cmd_info['usage']}`", inline=False)
+    embed.add_field(name="💡 Example", value=f"`{cmd_info['example']}`", inline=False)
+    embed.add_field(name="📋 Parameters", value=cmd_info['explanation'], inline=False)
+    embed.set_footer(text="💡 Tip: Use !start to see all basic commands!")
+    return embed
+
+# Fully built help embeds; nothing in them varies per user
+HELP_EMBEDS = MappingProxyType({name: _help_embed(info) for name, info in COMMAND_HELP.items()})
+
+_SUGGESTIONS = {
+    'prem': ('premium', 'premiumstatus', 'premiumdaily'),
+    'premium': ('premium', 'premiumstatus', 'buypremium'),
+    'money': ('addmoney', 'setmoney', 'work'),
+    'help': ('start', 'guide', 'emergency'),
+    'loan': ('deal', 'repay', 'loans'),
+    'steal': ('rob', 'crime', 'heist'),
+    'bet': ('gamble', 'premiumcasino'),
+    'stock': ('stocks', 'invest'),
+    'shop': ('shop', 'buy'),
+    'daily': ('daily', 'premiumdaily'),
+    'casino': ('gamble', 'premiumcasino'),
+    'heist': ('heist', 'premiumheist')
+}
+
+SUGGESTIONS = MappingProxyType(_SUGGESTIONS)
+
+SUGGESTIONS_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "❓ Command Not Found",
+    'color': 0xf39c12,
+    'fields': (field("📚 Need Help?", "Use `!start` to see all commands\nUse `!guide` for AI assistance", inline=False),)
+})
+
+NOT_FOUND_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "❓ Command Not Found",
+    'color': 0xe74c3c,
+    'fields': (field("📚 Available Commands", "Use `!start` to see all commands\nUse `!guide` for AI assistance", inline=False),)
+})
+
+START_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "🎮 Welcome to Poor to Rich Simulator!",
+    'color': 0x00ff00,
+    'fields': (
+        field(
+            "📋 Basic Commands",
+            "`!work` - Work for money\n`!crime` - Risk it for money\n`!profile` - View your stats\n`!shop` - Buy items\n`!leaderboard` - Top players\n`!daily` - Daily bonus\n`!gift @user amount` - Gift money to someone",
+            inline=False
+        ),
+        field(
+            "🎰 Advanced Features",
+            "`!gamble <amount>` - High risk gambling\n`!rob @user` - Rob other players\n`!stocks` - View stock market\n`!invest <stock> <shares>` - Buy stocks\n`!heist` - Start group heist\n`!achievements` - View achievements",
+            inline=False
+        ),
+        field(
+            "😈 Sukuna's Commands (Owner Only)",
+            "`!addmoney @user amount` - Add unlimited money\n`!setmoney @user amount` - Set exact money amount",
+            inline=False
+        ),
+    ),
+    'footer': {'text': "💾 Your progress is automatically saved!"}
+})
+
+PROFILE_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'color': 0x3498db,
+    'footer': {'text': "💾 Data saved in the bot database"}
+})
+
+WORK_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "💼 Work Complete!",
+    'color': 0x2ecc71,
+    'footer': {'text': "💾 Progress automatically saved!"}
+})
+
+CRIME_SUCCESS_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "😈 Crime Successful!",
+    'color': 0xe74c3c
+})
+
+CRIME_FAILURE_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "🚔 Busted!",
+    'description': "You got caught and paid a fine!",
+    'color': 0x95a5a6
+})
+
+STOCKS_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "📈 Stock Market",
+    'color': 0x1abc9c,
+    'footer': {'text': "💡 Use !invest <stock> <shares> to buy and !sell <stock> <shares> to sell"}
+})
+
+ACHIEVEMENTS_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'color': 0xf1c40f,
+    'footer': {'text': "💡 Achievements are awarded automatically as you play"}
+})
+
+HEIST_SUCCESS_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "💰 Heist Successful!",
+    'color': 0x2ecc71
+})
+
+HEIST_FAILURE_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "🚨 Heist Failed!",
+    'description': "The crew got caught and everyone paid a fine!",
+    'color': 0x95a5a6
+})
+
+GIFT_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "🎁 Gift Sent!",
+    'color': 0x9b59b6
+})
+
+LOAN_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "🤝 Loan Given!",
+    'color': 0x3498db,
+    'footer': {'text': "⚠️ If the loan isn't repaid with !repay in time, the borrower loses everything!"}
+})
+
+MONEY_LEADERBOARD_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "🏆 Richest Players",
+    'color': 0xf1c40f
+})
+
+LEVEL_LEADERBOARD_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'title': "📊 Level Leaderboard",
+    'color': 0xf1c40f
+})
+
+RANK_TEMPLATE = MappingProxyType({
+    'type': 'rich',
+    'color': 0xf1c40f
+})
+
+HEISTS = (
+    "cracked the bank vault",
+    "emptied the casino cage",
+    "hijacked an armored truck",
+    "robbed the jewelry store",
+    "looted the museum"
+)
+
+WORK_MESSAGES = (
+    "You worked hard and earned some money!",
+    "Another day, another dollar!",
+    "Your hard work is paying off!",
+    "You put in some honest work!",
+    "Time is money, and you just made some!"
+)
+
+CRIMES = (
+    "pickpocketed a wealthy businessman",
+    "found a wallet on the street",
+    "won a street game",
+    "sold some questionable items",
+    "completed a shady deal"
+)
+
+# plan: (price, duration in days, None for lifetime)
+PREMIUM_PLANS = MappingProxyType({
+    'week': (10000, 7),
+    'month': (35000, 30),
+    'lifetime': (100000, None)
+})
+
+JOB_MULTIPLIERS = MappingProxyType({
+    'Homeless': 0.5,
+    'Street Cleaner': 1.0,
+    'Cashier': 1.5,
+    'Office Worker': 2.0,
+    'Manager': 3.0,
+    'CEO': 5.0
+})
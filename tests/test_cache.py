@@ -0,0 +1,289 @@
+import asyncio
+
+import pytest
+
+from cache import ProfileCache
+from models import Profile, encode_profile, decode_profile
+from storage import MemoryStorage
+
+
+class SlowStorage(MemoryStorage):
+    """Reads yield to the loop, so concurrent commands interleave like they do on SQLite"""
+
+    async def get(self, key):
+        await asyncio.sleep(0)
+        return await super().get(key)
+
+
+def make_cache(storage=None, **kwargs):
+    return ProfileCache(storage or MemoryStorage(), encode=encode_profile, decode=decode_profile, **kwargs)
+
+
+def test_concurrent_creation_keeps_the_changed_profile():
+    async def scenario():
+        cache = make_cache(SlowStorage())
+
+        async def lookup():
+            # Like !profile: no lock, and never changes the profile
+            profile = await cache.get('1')
+            return profile if profile is not None else cache.setdefault('1', Profile())
+
+        async def work():
+            # Like !work: creates the profile and changes it straight away
+            profile = await cache.get('1')
+            if profile is None:
+                profile = cache.setdefault('1', Profile())
+            profile.money += 50
+            cache.put('1', profile)
+            return profile
+
+        worked, looked_up = await asyncio.gather(work(), lookup())
+        assert looked_up is worked
+        await cache.flush()
+        assert decode_profile(cache.storage.data['user_1']).money == 50
+
+    asyncio.run(scenario())
+
+
+def test_clean_put_never_replaces_unflushed_changes():
+    async def scenario():
+        cache = make_cache()
+        changed = Profile()
+        changed.money = 10
+        cache.put('1', changed)
+        cache.put('1', Profile(), dirty=False)
+        assert await cache.get('1') is changed
+        await cache.flush()
+        assert decode_profile(cache.storage.data['user_1']).money == 10
+
+    asyncio.run(scenario())
+
+
+def test_flush_skips_profiles_that_dont_encode():
+    async def scenario():
+        cache = make_cache()
+        broken = Profile(inventory={'phone': {'model': 'x'}})
+        cache.put('1', broken)
+        cache.put('2', Profile(money=5))
+        assert await cache.flush() == 1
+        assert cache.dirty_count == 0
+        assert 'user_1' not in cache.storage.data
+        assert decode_profile(cache.storage.data['user_2']).money == 5
+
+        # Later flushes aren't stuck on it
+        cache.put('3', Profile(money=7))
+        assert await cache.flush() == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_workers_merge_money_changes():
+    from models import merge_profiles
+
+    async def scenario():
+        storage = MemoryStorage()
+        await storage.put('user_1', encode_profile(Profile(money=100)))
+        worker_a = make_cache(storage, merge=merge_profiles)
+        worker_b = make_cache(storage, merge=merge_profiles)
+
+        a = await worker_a.get('1')
+        b = await worker_b.get('1')
+        a.money += 50
+        a.last_work = 1000
+        worker_a.put('1', a)
+        b.money += 10
+        b.inventory['car'] = 1
+        worker_b.put('1', b)
+
+        await worker_a.flush()
+        await worker_b.flush()
+        assert b.money == 160
+
+        stored = decode_profile(storage.data['user_1'])
+        assert (stored.money, stored.last_work, stored.inventory) == (160, 1000, {'car': 1})
+
+        # Worker A's copy is now stale; its next change merges in B's
+        a.money -= 20
+        worker_a.put('1', a)
+        await worker_a.flush()
+        assert decode_profile(storage.data['user_1']).money == 140
+
+    asyncio.run(scenario())
+
+
+def test_failed_merge_write_is_not_merged_twice():
+    from models import merge_profiles
+
+    class FlakyStorage(MemoryStorage):
+        calls = 0
+
+        async def compare_and_put_many(self, items, expected):
+            # The first write conflicts and merges, the retry fails
+            self.calls += 1
+            if self.calls == 2:
+                raise OSError("disk full")
+            return await super().compare_and_put_many(items, expected)
+
+    async def scenario():
+        storage = FlakyStorage()
+        await storage.put('user_1', encode_profile(Profile(money=100)))
+        cache = make_cache(storage, merge=merge_profiles)
+        profile = await cache.get('1')
+        await storage.put('user_1', encode_profile(Profile(money=130)))
+
+        profile.money += 5
+        cache.put('1', profile)
+        with pytest.raises(OSError):
+            await cache.flush()
+        await cache.flush()
+        assert decode_profile(storage.data['user_1']).money == 135
+
+    asyncio.run(scenario())
+
+
+def test_evicted_dirty_profiles_are_served_and_flushed():
+    async def scenario():
+        cache = make_cache(max_size=2)
+        profiles = {user_id: Profile(money=int(user_id)) for user_id in ('1', '2', '3')}
+        for user_id, profile in profiles.items():
+            cache.put(user_id, profile)
+        assert len(cache) == 2
+        assert cache.dirty_count == 3
+
+        # Storage doesn't have it yet, so the evicted copy must come back
+        assert await cache.get('1') is profiles['1']
+        assert await cache.flush() == 3
+        assert {key: decode_profile(value).money for key, value in cache.storage.data.items()} == {
+            'user_1': 1, 'user_2': 2, 'user_3': 3
+        }
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_is_retried_with_the_ledger_checkpoint(tmp_path):
+    from ledger import Ledger
+
+    class FailingStorage(MemoryStorage):
+        failures = 1
+
+        async def put_many(self, items):
+            if self.failures:
+                self.failures -= 1
+                raise OSError("database is locked")
+            await super().put_many(items)
+
+    async def scenario():
+        ledger = Ledger(str(tmp_path))
+        cache = make_cache(FailingStorage(), max_size=1, ledger=ledger)
+        for user_id in ('1', '2'):
+            profile = Profile(money=10)
+            ledger.append(user_id, 10, 'work')
+            cache.put(user_id, profile)
+
+        with pytest.raises(OSError):
+            await cache.flush()
+        assert cache.dirty_count == 2
+        assert cache.storage.data == {}
+
+        assert await cache.flush() == 2
+        assert cache.dirty_count == 0
+        assert set(cache.storage.data) == {'user_1', 'user_2', 'ledger_checkpoint'}
+        assert cache.storage.data['ledger_checkpoint'] == '2'
+        ledger.close()
+
+    asyncio.run(scenario())
+
+
+def shared_workers(path, **kwargs):
+    """Two caches on one SQLite file, like two worker processes"""
+    from models import merge_profiles
+    from storage import SQLiteStorage
+    return [make_cache(SQLiteStorage(str(path), writer_id), merge=merge_profiles, **kwargs)
+            for writer_id in ('a', 'b')]
+
+
+def test_profile_dropped_by_sync_while_held_still_merges(tmp_path):
+    async def scenario():
+        worker_a, worker_b = shared_workers(tmp_path / 'bot.db')
+        try:
+            await worker_a.storage.put('user_1', encode_profile(Profile(money=100)))
+            await worker_a.sync()
+            a = await worker_a.get('1')
+
+            b = await worker_b.get('1')
+            b.money += 10
+            worker_b.put('1', b)
+            await worker_b.flush()
+
+            # Like !buypremium awaiting the scheduler while holding the profile
+            assert await worker_a.sync() == ['1']
+            a.money += 50
+            worker_a.put('1', a)
+            await worker_a.flush()
+
+            stored = decode_profile(await worker_a.storage.get('user_1'))
+            assert stored.money == 160
+        finally:
+            await worker_a.storage.close()
+            await worker_b.storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_reloaded_profile_is_merged_into_the_held_one(tmp_path):
+    async def scenario():
+        worker_a, worker_b = shared_workers(tmp_path / 'bot.db')
+        try:
+            await worker_a.storage.put('user_1', encode_profile(Profile(money=100)))
+            await worker_a.sync()
+            a = await worker_a.get('1')
+
+            b = await worker_b.get('1')
+            b.money += 10
+            worker_b.put('1', b)
+            await worker_b.flush()
+
+            await worker_a.sync()
+            # Like !profile reading the user while another command holds them
+            reloaded = await worker_a.get('1')
+            assert reloaded is not a and reloaded.money == 110
+            a.money += 50
+            worker_a.put('1', a)
+            await worker_a.flush()
+
+            stored = decode_profile(await worker_a.storage.get('user_1'))
+            assert stored.money == 160
+        finally:
+            await worker_a.storage.close()
+            await worker_b.storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_profile_evicted_while_held_still_merges(tmp_path):
+    async def scenario():
+        worker_a, worker_b = shared_workers(tmp_path / 'bot.db', max_size=1)
+        try:
+            await worker_a.storage.put('user_1', encode_profile(Profile(money=100)))
+            await worker_a.storage.put('user_2', encode_profile(Profile()))
+            a = await worker_a.get('1')
+
+            b = await worker_b.get('1')
+            b.money += 10
+            worker_b.put('1', b)
+            await worker_b.flush()
+
+            # Like !gift loading the recipient and pushing the sender out
+            await worker_a.get('2')
+            assert a is not await worker_a.get('1')
+            a.money += 50
+            worker_a.put('1', a)
+            await worker_a.flush()
+
+            stored = decode_profile(await worker_a.storage.get('user_1'))
+            assert stored.money == 160
+        finally:
+            await worker_a.storage.close()
+            await worker_b.storage.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+import asyncio
+
+from cooldowns import CooldownService
+from storage import MemoryStorage
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_only_one_worker_claims_a_cooldown():
+    async def scenario():
+        storage, clock = MemoryStorage(), Clock()
+        worker_a = CooldownService(clock=clock, storage=storage, wall_clock=clock)
+        worker_b = CooldownService(clock=clock, storage=storage, wall_clock=clock)
+
+        assert await worker_a.claim('1', 'work', 300) == 0
+        assert await worker_b.claim('1', 'work', 300) == 300
+        # The rejection is remembered, so repeats don't reach storage
+        assert worker_b.remaining('1', 'work') == 300
+
+        clock.now += 300
+        assert await worker_b.claim('1', 'work', 300) == 0
+        assert await worker_a.claim('1', 'work', 300) == 300
+
+    asyncio.run(scenario())
+
+
+def test_shared_cooldowns_are_seen_by_other_workers():
+    async def scenario():
+        storage, clock = MemoryStorage(), Clock()
+        worker_a = CooldownService(clock=clock, storage=storage, wall_clock=clock)
+        worker_b = CooldownService(clock=clock, storage=storage, wall_clock=clock)
+
+        await worker_a.share(['1', '2'], 'heist', 1800)
+        clock.now += 600
+        assert await worker_b.fetch('2', 'heist') == 1200
+        assert await worker_b.fetch('3', 'heist') == 0
+
+    asyncio.run(scenario())
+
+
+def test_claim_without_storage_is_in_memory():
+    async def scenario():
+        cooldowns = CooldownService(clock=Clock())
+        assert await cooldowns.claim('1', 'crime', 600) == 0
+        assert await cooldowns.claim('1', 'crime', 600) == 600
+
+    asyncio.run(scenario())
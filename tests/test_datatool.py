@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+from datatool import BINARY_MAGIC, _BINARY_RECORD, import_profiles
+from models import Profile, encode_profile, decode_profile
+from storage import MemoryStorage
+
+
+def test_import_skips_malformed_lines(tmp_path, capsys):
+    path = tmp_path / 'profiles.ndjson'
+    path.write_text('\n'.join([
+        json.dumps({'user_id': 1, 'profile': {'money': 100}}),
+        json.dumps({'user_id': 2, 'profile': {'money': 'abc'}}),
+        json.dumps({'profile': {'money': 5}}),
+        '{"user_id": 4, "prof',
+        json.dumps({'user_id': 5, 'profile': {'money': 50}}),
+    ]) + '\n')
+    storage = MemoryStorage()
+
+    asyncio.run(import_profiles(storage, str(path), batch_size=2))
+
+    assert sorted(storage.data) == ['user_1', 'user_5']
+    assert decode_profile(storage.data['user_5']).money == 50
+    err = capsys.readouterr().err
+    assert 'Skipping line 2' in err and 'Skipping line 3' in err and 'Skipping line 4' in err
+    assert '3 skipped' in err
+
+
+def test_import_skips_bad_and_truncated_binary_records(tmp_path, capsys):
+    def record(user_id, value):
+        key = user_id.encode('utf-8')
+        return _BINARY_RECORD.pack(len(key), len(value)) + key + value
+
+    good = encode_profile(Profile(money=100))
+    path = tmp_path / 'profiles.bin'
+    path.write_bytes(
+        BINARY_MAGIC + record('1', good) + record('2', b'\xffjunk') + record('3', good) + record('4', good)[:-3]
+    )
+    storage = MemoryStorage()
+
+    asyncio.run(import_profiles(storage, str(path), batch_size=10))
+
+    assert sorted(storage.data) == ['user_1', 'user_3']
+    err = capsys.readouterr().err
+    assert 'Skipping record 2' in err and 'Skipping record 4' in err
@@ -0,0 +1,73 @@
+import asyncio
+
+import discord
+
+from dispatcher import Dispatcher, MAX_CONTENT, MAX_EMBEDS, coalesced_messages, dropped_messages
+
+
+class Channel:
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, content=None, embeds=()):
+        self.sent.append((content, list(embeds)))
+
+
+def test_queued_replies_are_coalesced():
+    async def scenario():
+        dispatcher, channel = Dispatcher(), Channel()
+        coalesced = coalesced_messages.value()
+        for text in ('one', 'two', 'three'):
+            dispatcher.send(channel, text)
+        await dispatcher.close()
+
+        assert channel.sent == [('one\ntwo\nthree', [])]
+        assert coalesced_messages.value() - coalesced == 2
+        assert dispatcher.queue_depth == 0
+
+    asyncio.run(scenario())
+
+
+def test_coalescing_respects_discord_size_limits():
+    async def scenario():
+        dispatcher, channel = Dispatcher(channel_burst=10), Channel()
+        long_text = 'x' * (MAX_CONTENT // 2 + 1)
+        dispatcher.send(channel, long_text)
+        dispatcher.send(channel, long_text)
+        for i in range(MAX_EMBEDS + 1):
+            dispatcher.send(channel, embed=discord.Embed(title=str(i)))
+        await dispatcher.close()
+
+        assert [content for content, _ in channel.sent] == [long_text, long_text, None]
+        assert [len(embeds) for _, embeds in channel.sent] == [0, MAX_EMBEDS, 1]
+
+    asyncio.run(scenario())
+
+
+def test_replies_beyond_the_queue_limit_are_dropped():
+    async def scenario():
+        dispatcher, channel = Dispatcher(max_queue=2), Channel()
+        dropped = dropped_messages.value()
+        for text in ('one', 'two', 'three'):
+            dispatcher.send(channel, text)
+        await dispatcher.close()
+
+        assert channel.sent == [('one\ntwo', [])]
+        assert dropped_messages.value() - dropped == 1
+
+    asyncio.run(scenario())
+
+
+def test_channels_are_queued_separately():
+    async def scenario():
+        dispatcher, first, second = Dispatcher(), Channel(1), Channel(2)
+        dispatcher.send(first, 'a')
+        dispatcher.send(second, 'b')
+        dispatcher.send(first, 'c')
+        await dispatcher.close()
+
+        assert first.sent == [('a\nc', [])]
+        assert second.sent == [('b', [])]
+
+    asyncio.run(scenario())
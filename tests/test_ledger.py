@@ -0,0 +1,74 @@
+import os
+
+from ledger import Ledger, RECORD_SIZE, SEGMENT_SUFFIX
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+
+
+def test_segments_roll_over_and_reopen(tmp_path):
+    ledger = Ledger(str(tmp_path), segment_size=4 * RECORD_SIZE)
+    seqs = [ledger.append(1, 10, 'work') for _ in range(10)]
+    assert seqs == list(range(1, 11))
+    assert len(segment_files(tmp_path)) == 3
+    ledger.close()
+
+    ledger = Ledger(str(tmp_path), segment_size=4 * RECORD_SIZE)
+    assert ledger.last_seq == 10
+    assert [event.seq for event in ledger.events()] == list(range(1, 11))
+    assert ledger.append(1, 10, 'work') == 11
+    ledger.close()
+
+
+def test_torn_tail_is_dropped_and_overwritten(tmp_path):
+    ledger = Ledger(str(tmp_path))
+    for delta in (1, 2, 3, 4, 5):
+        ledger.append(7, delta, 'work')
+    ledger.close()
+
+    # A crash mid-write leaves the last record half written
+    path = os.path.join(tmp_path, segment_files(tmp_path)[0])
+    with open(path, 'r+b') as f:
+        f.seek(4 * RECORD_SIZE + 20)
+        f.write(b'\xff\xff')
+
+    ledger = Ledger(str(tmp_path))
+    assert ledger.last_seq == 4
+    assert ledger.replay(0) == {7: 10}
+    assert ledger.append(7, 100, 'gift_received') == 5
+    assert ledger.replay(0) == {7: 110}
+    ledger.close()
+
+
+def test_checkpoint_compacts_covered_segments(tmp_path):
+    ledger = Ledger(str(tmp_path), segment_size=4 * RECORD_SIZE, retain_segments=1)
+    for _ in range(12):
+        ledger.append(1, 1, 'work')
+    assert len(segment_files(tmp_path)) == 3
+
+    # Segments 1-4 and 5-8 are covered; the newest covered one is kept for auditing
+    ledger.checkpoint(8)
+    assert segment_files(tmp_path) == [f"{5:020d}{SEGMENT_SUFFIX}", f"{9:020d}{SEGMENT_SUFFIX}"]
+    assert [event.seq for event in ledger.events()] == list(range(5, 13))
+
+    # The active segment is never compacted
+    ledger.checkpoint(12)
+    assert len(segment_files(tmp_path)) == 2
+    ledger.close()
+
+
+def test_replay_only_sums_events_after_the_checkpoint(tmp_path):
+    ledger = Ledger(str(tmp_path), segment_size=4 * RECORD_SIZE)
+    ledger.append(1, 50, 'work')
+    ledger.append(2, -20, 'gift_sent')
+    checkpoint = ledger.last_seq
+    ledger.append(1, 30, 'crime')
+    ledger.append(2, 20, 'gift_received')
+    ledger.append(1, -5, 'crime_fine')
+
+    assert ledger.replay(0) == {1: 75, 2: 0}
+    assert ledger.replay(checkpoint) == {1: 25, 2: 20}
+    assert ledger.replay(ledger.last_seq) == {}
+    assert [event.reason for event in ledger.events(checkpoint, user_id=1)] == ['crime', 'crime_fine']
+    ledger.close()
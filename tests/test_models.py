@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from models import Profile, decode_profile, encode_profile
+
+
+def test_legacy_values_are_converted_to_codec_types():
+    profile = Profile.from_dict({
+        'money': 12.7,
+        'level': '3',
+        'inventory': {'phone': {'model': 'x'}, 'car': 2},
+        'achievements': ['First'],
+        'last_work': '2024-01-01T12:00:00',
+    })
+    assert profile.money == 12
+    assert profile.level == 3
+    assert profile.inventory == {'phone': 1, 'car': 2}
+    assert isinstance(profile.last_work, int)
+    assert decode_profile(encode_profile(profile)) == profile
+
+
+def test_legacy_item_list_becomes_counts():
+    assert Profile.from_dict({'inventory': ['phone', 'laptop']}).inventory == {'phone': 1, 'laptop': 1}
+
+
+def test_unconvertible_values_raise_value_error():
+    with pytest.raises(ValueError):
+        decode_profile(json.dumps({'money': {'amount': 5}}))
+
+
+def full_profile():
+    return Profile(
+        money=1234, job='CEO', level=7, experience=42,
+        last_work=1700000000, last_crime=None, last_daily=1700000100,
+        inventory={'phone': 1, 'car': 2}, achievements=['💵 First Paycheck'],
+        created_at=1600000000, premium=True, premium_expires=1800000000,
+        premium_features_used={'heist': 3}, stocks={'TECH': 10}
+    )
+
+
+def test_codec_round_trip():
+    profile = full_profile()
+    assert decode_profile(encode_profile(profile)) == profile
+    blank = Profile()
+    assert decode_profile(encode_profile(blank)) == blank
+
+
+def test_version_1_decodes_without_stocks():
+    profile = full_profile()
+    data = encode_profile(profile)
+    # Version 1 is version 2 minus the trailing stock holdings
+    stocks_length = 2 + (2 + len('TECH')) + 8
+    v1 = bytes([1]) + data[1:-stocks_length]
+    decoded = decode_profile(v1)
+    profile.stocks = {}
+    assert decoded == profile
+
+
+def test_legacy_json_decodes_and_migrates():
+    legacy = json.dumps({
+        'money': 500, 'job': 'Cashier', 'level': 2, 'experience': 10,
+        'last_work': '2024-03-01T08:30:00', 'last_crime': None, 'last_daily': None,
+        'inventory': {}, 'achievements': [], 'created_at': '2024-01-01T00:00:00',
+        'premium': False, 'premium_expires': None, 'premium_features_used': {}
+    })
+    profile = decode_profile(legacy)
+    assert (profile.money, profile.job, profile.stocks) == (500, 'Cashier', {})
+    assert isinstance(profile.last_work, int)
+    migrated = encode_profile(profile)
+    assert migrated[0] == 2
+    assert decode_profile(migrated) == profile
+
+
+def test_unknown_or_truncated_data_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_profile(b'\x09rest')
+    with pytest.raises(ValueError):
+        decode_profile(encode_profile(full_profile())[:20])
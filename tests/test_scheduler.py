@@ -0,0 +1,78 @@
+import asyncio
+
+from scheduler import DeadlineScheduler
+from storage import MemoryStorage
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_failed_batch_only_retries_unfinished_deadlines():
+    async def scenario():
+        clock = Clock()
+        collected = []
+        failures = [RuntimeError('storage hiccup')] * 2
+
+        async def collect(deadlines):
+            # Like collect_overdue_loans: each loan is committed on its own
+            for deadline in deadlines:
+                if not await scheduler.is_live(deadline):
+                    continue
+                if deadline.item_id == 'bad' and failures:
+                    raise failures.pop()
+                collected.append(deadline.item_id)
+                await scheduler.complete(deadline)
+
+        storage = MemoryStorage()
+        scheduler = DeadlineScheduler(storage, {'loan': collect}, retry_delay=60, clock=clock)
+        await scheduler.schedule('loan', 'alice', 900)
+        await scheduler.schedule('loan', 'bad', 950)
+
+        assert await scheduler.run_due() == 1
+        assert collected == ['alice']
+        assert await storage.get('deadline_loan_alice') == ''
+
+        # Retried without alice, who was already collected
+        clock.now += 60
+        assert await scheduler.run_due() == 0
+        assert collected == ['alice']
+
+        clock.now += 60
+        assert await scheduler.run_due() == 1
+        assert collected == ['alice', 'bad']
+        assert len(scheduler) == 0
+        assert await storage.get('deadline_loan_bad') == ''
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_deadline_is_not_fired():
+    async def scenario():
+        clock = Clock()
+        fired = []
+
+        async def expire(deadlines):
+            for deadline in deadlines:
+                if await scheduler.is_live(deadline):
+                    fired.append(deadline.item_id)
+
+        storage = MemoryStorage()
+        scheduler = DeadlineScheduler(storage, {'premium': expire}, clock=clock)
+        await scheduler.schedule('premium', '1', 900)
+        await scheduler.schedule('premium', '2', 900)
+        await scheduler.cancel('premium', '1')
+
+        assert await scheduler.run_due() == 1
+        assert fired == ['2']
+        # Handlers that don't call complete() are cleared in one batch afterwards
+        assert await storage.get('deadline_premium_2') == ''
+
+        reloaded = DeadlineScheduler(storage, {'premium': expire}, clock=clock)
+        assert await reloaded.load() == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,21 @@
+from types import SimpleNamespace
+
+from suggest import SuggestionIndex, _edit_distance
+
+
+def make_index(*names):
+    index = SuggestionIndex()
+    index.sync({name: SimpleNamespace(name=name, hidden=False) for name in names})
+    return index
+
+
+def test_swapped_letters_count_as_one_edit():
+    assert _edit_distance('wrok', 'work', 1) == 1
+    assert _edit_distance('rnak', 'rank', 1) == 1
+    assert _edit_distance('kitten', 'sitting', 5) == 3
+
+
+def test_swapped_letters_are_suggested():
+    index = make_index('work', 'crime', 'rank', 'profile', 'gift')
+    assert index.suggest('wrok')[0] == 'work'
+    assert index.suggest('rnak')[0] == 'rank'